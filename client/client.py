@@ -1,5 +1,11 @@
+import os
 import socket
+import struct
+import uuid
+import zlib
 from ds.queue import Fila, FilaError
+from ds.shm_ring import ShmChannel, ShmRing
+from ds.spool import FilaPersistente
 
 class TaskClient:
     """
@@ -8,20 +14,47 @@ class TaskClient:
     Atributos:
     host (str): Endereço do servidor.
     port (int): Porta de comunicação com o servidor.
-    message_queue (Fila): Fila encadeada para gerenciar mensagens enviadas e recebidas.
+    message_queue (Fila): Fila de saída com os comandos ainda não confirmados pelo servidor.
+    response_queue (Fila): Fila com as respostas recebidas do servidor.
+    read_cache (dict): Última resposta de cada consulta e sua versão, para leituras condicionais.
+    namespace (str): Lista de tarefas escolhida com USE (None enquanto for a lista padrão do servidor).
+    decompressor: Fluxo deflate das respostas quando a compressão foi negociada (None sem compressão).
+    transport (str): Transporte escolhido ("auto", "tcp", "unix" ou "shm").
     """
+
+    MUTATING_COMMANDS = {"ADD", "ADD_SUBTASK", "COMPLETE_SUBTASK", "REMOVE_SUBTASK", "REMOVE", "COMPLETE", "EDIT"}
+    CACHEABLE_COMMANDS = {"LIST", "LIST_DETAILED", "TASK_HISTORY", "SEARCH", "LIST_SUBTASKS"}
+    MAX_BATCH_BYTES = 1024  # O servidor lê cada mensagem com recv(1024)
+    FRAME = struct.Struct('>cI')  # Cabeçalho das respostas com compressão: tipo ("Z" ou "R") e tamanho
+    TRANSPORTS = ("auto", "tcp", "unix", "shm")
+    LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
     
-    def __init__(self, host: str = 'localhost', port: int = 12345) -> None:
+    def __init__(self, host: str = 'localhost', port: int = 12345, spool_path: str = None, compress: bool = False,
+                 unix_path: str = None, transport: str = "auto") -> None:
         """
         Inicializa o cliente com o endereço e porta do servidor.
 
         Args:
         host (str): Endereço do servidor. Padrão é 'localhost'.
         port (int): Porta de comunicação com o servidor. Padrão é 12345.
+        spool_path (str, optional): Arquivo de spool da fila de saída. Se informado, comandos de alteração
+            feitos sem conexão (ou sem resposta) são guardados em disco e reenviados na próxima conexão.
+        compress (bool): Pede ao servidor que comprima as respostas grandes desta conexão.
+        unix_path (str, optional): Caminho do Unix domain socket do servidor (opção --unix do servidor).
+        transport (str): "tcp", "unix", "shm" ou "auto" (padrão), que escolhe o mais rápido disponível:
+            memória compartilhada, depois Unix domain socket e, por fim, TCP.
         """
         self.host = host
         self.port = port
-        self.message_queue = Fila()
+        self.message_queue = FilaPersistente(spool_path) if spool_path else Fila()
+        self.response_queue = Fila()
+        self.read_cache = {}
+        self.spool_path = spool_path
+        self.namespace = None
+        self.compress = compress
+        self.decompressor = None
+        self.unix_path = unix_path
+        self.transport = transport
 
     def connect(self) -> None:
         """
@@ -30,17 +63,86 @@ class TaskClient:
         Se a conexão falhar, exibe uma mensagem de erro para o usuário.
         """
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as client_socket:
-                client_socket.connect((self.host, self.port))
-                print(f"Conectado ao servidor em {self.host}:{self.port}")
-                self.interact(client_socket)
+            with self.open_socket() as client_socket:
+                channel = self.open_shm_channel(client_socket)
+                try:
+                    if channel:
+                        print(f"Conectado ao servidor em {self.host}:{self.port} (memória compartilhada)")
+                    elif client_socket.family == socket.AF_UNIX:
+                        print(f"Conectado ao servidor em {self.unix_path}")
+                    else:
+                        print(f"Conectado ao servidor em {self.host}:{self.port}")
+                    if self.compress and not channel:
+                        self.negotiate_compression(client_socket)
+                    self.replay_outbox(channel or client_socket)
+                    self.interact(channel or client_socket)
+                finally:
+                    if channel:
+                        channel.close()
         except ConnectionRefusedError:
             print(f"Erro: Não foi possível conectar ao servidor {self.host}:{self.port}. Verifique se o servidor está ativo.")
+            if self.spool_path:
+                self.interact_offline()
         except socket.gaierror:
             print(f"Erro: Nome ou endereço do host inválido ({self.host}).")
         except Exception as e:
             print(f"Erro inesperado ao tentar conectar: {str(e)}")
 
+    def open_socket(self) -> socket.socket:
+        """
+        Abre a conexão com o servidor. Na mesma máquina, usa o Unix domain socket quando ele existe,
+        evitando a pilha TCP; se a conexão por ele falhar, volta ao TCP (exceto com o transporte "unix").
+
+        Returns:
+        socket.socket: O socket conectado.
+        """
+        if self.transport == "unix" and not self.unix_path:
+            raise ValueError("o transporte unix exige o caminho do socket (--unix)")
+        local = self.host in self.LOCAL_HOSTS
+        if self.transport == "unix" or (self.transport != "tcp" and local and self.unix_path and os.path.exists(self.unix_path)):
+            unix_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                unix_socket.connect(self.unix_path)
+                return unix_socket
+            except OSError:
+                unix_socket.close()
+                if self.transport == "unix":
+                    raise
+        client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            client_socket.connect((self.host, self.port))
+        except OSError:
+            client_socket.close()
+            raise
+        return client_socket
+
+    def open_shm_channel(self, client_socket: socket.socket) -> ShmChannel:
+        """
+        Pede ao servidor um canal de memória compartilhada (SHM_OPEN) e se conecta a ele. A conexão
+        continua aberta e mantém o canal vivo. No modo "auto", o canal só é pedido para servidores
+        locais, sem compressão e com mais de uma CPU disponível: com uma só CPU, a espera ativa do
+        canal fica mais lenta que o socket.
+
+        Args:
+        client_socket (socket.socket): A conexão já aberta com o servidor.
+
+        Returns:
+        ShmChannel: O canal, ou None se ele não foi pedido ou o servidor não o ofereceu.
+        """
+        if self.transport == "auto":
+            if self.compress or ShmRing.YIELD or (client_socket.family != socket.AF_UNIX and self.host not in self.LOCAL_HOSTS):
+                return None
+        elif self.transport != "shm":
+            return None
+        client_socket.sendall("SHM_OPEN".encode())
+        reply = client_socket.recv(1024).decode()
+        if not reply.startswith("SHM "):
+            if self.transport == "shm":
+                print(f"Memória compartilhada indisponível: {reply}")
+            return None
+        _, name, capacity = reply.split()
+        return ShmChannel.attach(name, int(capacity))
+
     def interact(self, client_socket: socket.socket) -> None:
         """
         Interage com o servidor enviando comandos e recebendo respostas.
@@ -55,43 +157,277 @@ class TaskClient:
                 print("Desconectando...")
                 break
 
+            compress_mode = command.upper().split()[1:2] if self.command_action(command) == "COMPRESS" else None
+            if compress_mode == ["ON"]:
+                self.negotiate_compression(client_socket, command)
+                continue
+
+            # Com o spool, só as alterações passam pela fila em disco; consultas são enviadas direto
+            queued = not self.spool_path or self.command_action(command) in self.MUTATING_COMMANDS
             try:
-                self.message_queue.enfileira(command)
-                self.send_message(client_socket)
-                response = client_socket.recv(1024).decode()
-                self.message_queue.enfileira(response)
+                if queued:
+                    self.message_queue.enfileira(self.tag_command(command))
+                    self.send_message(client_socket)
+                else:
+                    client_socket.sendall(self.tag_command(command).encode())
+                data = self.receive_version(client_socket, self.receive(client_socket))
+                if not data:
+                    raise ConnectionResetError("conexão encerrada pelo servidor")
+                if queued:
+                    self.message_queue.desenfileira()  # Comando confirmado pelo servidor
+                if compress_mode == ["OFF"]:
+                    self.decompressor = None  # Respostas seguintes chegam sem quadros
+                self.response_queue.enfileira(self.apply_version(command, data.decode()))
                 self.process_response()
             except socket.error:
                 print("Erro: Falha na comunicação com o servidor. Verifique sua conexão.")
+                if self.spool_path:
+                    print(f"{len(self.message_queue)} comando(s) guardado(s) para reenvio na próxima conexão.")
                 break
             except FilaError as fe:
                 print(f"Erro na manipulação da fila: {str(fe)}")
             except Exception as e:
                 print(f"Erro inesperado: {str(e)}")
 
+    def interact_offline(self) -> None:
+        """
+        Modo sem conexão: os comandos de alteração são guardados na fila de saída em disco
+        para serem reenviados quando o servidor voltar a estar acessível.
+        """
+        print(f"Modo sem conexão: comandos de alteração serão guardados em {self.spool_path}.")
+        while True:
+            command = input("Digite um comando (sem conexão): ")
+
+            if command.lower() == 'exit':
+                print(f"{len(self.message_queue)} comando(s) pendente(s) para reenvio.")
+                break
+
+            if self.command_action(command) == "USE":
+                self.tag_command(command)
+                print(f"Comandos seguintes serão guardados para a lista {self.namespace}.")
+                continue
+            if self.command_action(command) not in self.MUTATING_COMMANDS:
+                print("Sem conexão: apenas comandos de alteração (ADD, ADD_SUBTASK, COMPLETE_SUBTASK, REMOVE_SUBTASK, REMOVE, COMPLETE, EDIT) são guardados.")
+                continue
+            try:
+                self.message_queue.enfileira(self.tag_command(command))
+                print("Comando guardado para reenvio.")
+            except FilaError as fe:
+                print(f"Erro na manipulação da fila: {str(fe)}")
+
+    def tag_command(self, command: str) -> str:
+        """
+        Prefixa as consultas com a versão da última resposta guardada ("IF_VERSION <versão> <comando>"),
+        para que o servidor só reenvie os dados se eles mudaram. Com o spool ativo, prefixa os comandos
+        de alteração com uma chave de idempotência ("KEY <chave> <comando>"), permitindo que o servidor
+        ignore reenvios já executados.
+
+        Os comandos guardados no spool levam o prefixo da lista escolhida com USE ("<lista>:<comando>"),
+        pois ao reconectar o servidor volta a usar a lista padrão.
+
+        Args:
+        command (str): O comando digitado pelo usuário.
+
+        Returns:
+        str: O comando a ser enviado.
+        """
+        action = self.command_action(command)
+        if action == "USE":
+            parts = command.split()
+            if len(parts) == 2 and ':' not in parts[0]:
+                self.namespace = parts[1]
+            return command
+        if action in self.CACHEABLE_COMMANDS:
+            cached = self.read_cache.get(self.cache_key(command))
+            return f"IF_VERSION {cached[0] if cached else '-'} {command}"
+        if self.spool_path and action in self.MUTATING_COMMANDS:
+            if self.namespace and ':' not in command.split(maxsplit=1)[0]:
+                command = f"{self.namespace}:{command}"
+            return f"KEY {uuid.uuid4().hex} {command}"
+        return command
+
+    def command_action(self, command: str) -> str:
+        """Retorna o nome do comando em maiúsculas, ignorando um prefixo de lista ("<lista>:<comando>")."""
+        parts = command.split(maxsplit=1)
+        if not parts:
+            return ""
+        return parts[0].rsplit(':', 1)[-1].upper()
+
+    def cache_key(self, command: str) -> str:
+        return f"{self.namespace or ''}|{' '.join(command.split()).upper()}"
+
+    def apply_version(self, command: str, response: str) -> str:
+        """
+        Trata a resposta de uma leitura condicional: "NOT_MODIFIED" é trocado pela resposta
+        guardada e "VERSION <versão> <tamanho>" atualiza o cache local com os novos dados. Uma
+        resposta com menos bytes que o tamanho anunciado é exibida, mas não é guardada.
+
+        Args:
+        command (str): O comando digitado pelo usuário.
+        response (str): A resposta recebida do servidor.
+
+        Returns:
+        str: A resposta a ser exibida.
+        """
+        key = self.cache_key(command)
+        if response.startswith("NOT_MODIFIED"):
+            cached = self.read_cache.get(key)
+            return cached[1] if cached else response
+        if response.startswith("VERSION "):
+            header, _, payload = response.partition('\n')
+            fields = header.split()
+            if len(fields) == 3 and fields[2].isdigit() and len(payload.encode()) == int(fields[2]):
+                self.read_cache[key] = (fields[1], payload)
+            else:
+                self.read_cache.pop(key, None)
+            return payload
+        return response
+
+    def replay_outbox(self, client_socket: socket.socket) -> None:
+        """
+        Reenvia os comandos pendentes da fila de saída em lotes (comando BATCH), cada um com
+        no máximo MAX_BATCH_BYTES. Os comandos só saem da fila quando o servidor responde ao lote
+        por inteiro: a resposta termina com uma quebra de linha depois da resposta de cada comando.
+
+        Args:
+        client_socket (socket.socket): O socket usado para a comunicação com o servidor.
+        """
+        if self.message_queue.esta_vazia():
+            return
+        print(f"Reenviando {len(self.message_queue)} comando(s) pendente(s)...")
+
+        while not self.message_queue.esta_vazia():
+            batch = ["BATCH"]
+            size = len("BATCH")
+            while len(batch) - 1 < len(self.message_queue):
+                # elemento(len - i) é o i-ésimo comando a partir da frente da fila
+                command = self.message_queue.elemento(len(self.message_queue) - (len(batch) - 1))
+                if len(batch) > 1 and size + 1 + len(command.encode()) > self.MAX_BATCH_BYTES:
+                    break
+                batch.append(command)
+                size += 1 + len(command.encode())
+
+            client_socket.sendall("\n".join(batch).encode())
+            data = self.receive(client_socket, 4096)
+            if not data:
+                raise ConnectionResetError("conexão encerrada pelo servidor")
+            if not data.startswith("Lote com".encode()):
+                print(f"Lote recusado pelo servidor: {data.decode()}")  # Comandos continuam na fila
+                return
+            # Cabeçalho e uma linha por comando, cada um terminado por "\n" (respostas de alterações têm uma linha)
+            while data.count(b"\n") < len(batch):
+                chunk = self.receive(client_socket, 4096)
+                if not chunk:
+                    raise ConnectionResetError("conexão encerrada no meio da resposta do lote")
+                data += chunk
+            self.message_queue.desenfileira_varios(len(batch) - 1)
+            self.response_queue.enfileira(data.decode())
+            self.process_response()
+
+    def negotiate_compression(self, client_socket: socket.socket, command: str = "COMPRESS ON") -> None:
+        """
+        Pede ao servidor a compressão das respostas ("COMPRESS ON [limite]"). O servidor responde com o
+        limite e o dicionário do fluxo deflate; a partir daí, as respostas chegam em quadros e são
+        descomprimidas por "receive". Servidores sem suporte apenas continuam sem compressão.
+
+        Args:
+        client_socket (socket.socket): O socket usado para a comunicação com o servidor.
+        command (str): O comando de negociação, com o limite opcional.
+        """
+        if self.decompressor:
+            print("Compressão já está ativa.")
+            return
+        client_socket.sendall(command.encode())
+        data = client_socket.recv(1024)
+        if not data.startswith(b"COMPRESSION ON "):
+            print(f"Resposta do servidor: {data.decode()}")
+            return
+        while b"\n" not in data:
+            data += self.receive_exact(client_socket, 1)
+        header, _, dictionary = data.partition(b"\n")
+        threshold, size = (int(value) for value in header.split()[2:4])
+        dictionary += self.receive_exact(client_socket, size - len(dictionary))
+        self.decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=dictionary)
+        print(f"Compressão ativa para respostas a partir de {threshold} bytes.")
+
+    def receive(self, client_socket: socket.socket, size: int = 1024) -> bytes:
+        """
+        Recebe uma resposta do servidor. Sem compressão, faz uma leitura de até "size" bytes; com
+        compressão, lê um quadro inteiro e o descomprime se necessário.
+
+        Returns:
+        bytes: A resposta, ou b'' se o servidor encerrou a conexão.
+        """
+        if not self.decompressor:
+            return client_socket.recv(size)
+        header = self.receive_exact(client_socket, self.FRAME.size)
+        if not header:
+            return b''
+        kind, length = self.FRAME.unpack(header)
+        payload = self.receive_exact(client_socket, length)
+        return self.decompressor.decompress(payload) if kind == b'Z' else payload
+
+    def receive_version(self, client_socket: socket.socket, data: bytes) -> bytes:
+        """
+        Completa a leitura de uma resposta "VERSION <versão> <tamanho>": sem compressão, a
+        primeira leitura pode trazer só o começo dos dados, e o restante é lido até o tamanho
+        anunciado. Outras respostas são devolvidas sem alteração.
+
+        Args:
+        client_socket (socket.socket): O socket usado para a comunicação com o servidor.
+        data (bytes): O que já foi recebido da resposta.
+
+        Returns:
+        bytes: A resposta completa.
+        """
+        if not data.startswith(b"VERSION "):
+            return data
+        while b"\n" not in data:
+            chunk = self.receive_exact(client_socket, 1)
+            if not chunk:
+                raise ConnectionResetError("conexão encerrada no meio de uma resposta")
+            data += chunk
+        header, _, payload = data.partition(b"\n")
+        fields = header.split()
+        if len(fields) < 3 or not fields[2].isdigit():
+            return data  # Servidor anterior ao tamanho no cabeçalho: nada a completar
+        missing = int(fields[2]) - len(payload)
+        return data + self.receive_exact(client_socket, missing) if missing > 0 else data
+
+    def receive_exact(self, client_socket: socket.socket, size: int) -> bytes:
+        """Lê exatamente "size" bytes (ou b'' se a conexão for encerrada antes do primeiro byte)."""
+        chunks = []
+        remaining = size
+        while remaining:
+            chunk = client_socket.recv(min(remaining, 1 << 16))
+            if not chunk:
+                if chunks:
+                    raise ConnectionResetError("conexão encerrada no meio de uma resposta")
+                return b''
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b''.join(chunks)
+
     def send_message(self, client_socket: socket.socket) -> None:
         """
-        Envia a mensagem atual ao servidor usando a fila de mensagens.
+        Envia o comando da frente da fila de saída ao servidor. O comando permanece na fila
+        até que a resposta seja recebida.
 
         Args:
         client_socket (socket.socket): O socket usado para a comunicação com o servidor.
         """
         try:
-            message = self.message_queue.desenfileira()
+            message = self.message_queue.frente()
             client_socket.sendall(message.encode())
         except FilaError as fe:
             print(f"Erro ao enviar a mensagem: {str(fe)}")
-        except socket.error:
-            print("Erro: Falha ao enviar dados ao servidor.")
-        except Exception as e:
-            print(f"Erro inesperado ao enviar a mensagem: {str(e)}")
 
     def process_response(self) -> None:
         """
-        Processa a resposta recebida do servidor a partir da fila de mensagens.
+        Processa a resposta recebida do servidor a partir da fila de respostas.
         """
         try:
-            response = self.message_queue.desenfileira()
+            response = self.response_queue.desenfileira()
             print(f"Resposta do servidor: {response}")
         except FilaError as fe:
             print(f"Erro ao processar a resposta: {str(fe)}")
@@ -100,5 +436,18 @@ class TaskClient:
 
 
 if __name__ == '__main__':
-    client = TaskClient()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cliente do sistema de gerenciamento de tarefas.")
+    parser.add_argument('--host', default='localhost', help="Endereço do servidor.")
+    parser.add_argument('--port', type=int, default=12345, help="Porta do servidor.")
+    parser.add_argument('--spool', help="Arquivo de spool para guardar comandos enquanto o servidor estiver inacessível.")
+    parser.add_argument('--compress', action='store_true', help="Pede ao servidor que comprima as respostas grandes.")
+    parser.add_argument('--unix', help="Caminho do Unix domain socket do servidor, usado quando ele está na mesma máquina.")
+    parser.add_argument('--transport', choices=TaskClient.TRANSPORTS, default="auto",
+                        help="Transporte: tcp, unix, shm (memória compartilhada) ou auto (o mais rápido disponível).")
+    args = parser.parse_args()
+
+    client = TaskClient(args.host, args.port, spool_path=args.spool, compress=args.compress,
+                        unix_path=args.unix, transport=args.transport)
     client.connect()
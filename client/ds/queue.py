@@ -1,3 +1,6 @@
+import threading
+
+
 class FilaError(Exception):
     def __init__(self, msg:str):
         super().__init__(msg)
@@ -18,10 +21,10 @@ class Descritor:
         self.tamanho = 0
 
 
-class Fila:
+class FilaEncadeada:
     '''
-    Classe que implementa a estrutura de dados Pilha usando a 
-    técnica sequencial
+    Classe que implementa a estrutura de dados Fila usando a
+    técnica encadeada (um nó alocado por elemento)
     '''
     def __init__(self):
         self.__head = Descritor()
@@ -115,4 +118,250 @@ class Fila:
                 self.__enfileira(fila2.desenfileira())
         if (not fila1.esta_vazia() and  fila2.esta_vazia()):
             while( not fila1.esta_vazia()):
-                self.__enfileira(fila1.desenfileira())
\ No newline at end of file
+                self.__enfileira(fila1.desenfileira())
+
+
+class Fila:
+    '''
+    Classe que implementa a estrutura de dados Fila usando a técnica
+    sequencial: um buffer circular (ring buffer) sobre uma lista que
+    cresce dobrando de tamanho. Oferece a mesma interface da FilaEncadeada,
+    com acesso O(1) por posição e operações em lote.
+
+    Opcionalmente, a fila pode ter capacidade limitada. Nesse caso, com
+    "bloqueante=True", produtores esperam por espaço e consumidores
+    esperam por elementos (uso entre threads); sem bloqueio, a fila
+    cheia ou vazia gera FilaError.
+    '''
+    CAPACIDADE_INICIAL = 16
+
+    def __init__(self, capacidade:int = None, bloqueante:bool = False):
+        if capacidade is not None and capacidade < 1:
+            raise FilaError('Capacidade deve ser maior que zero')
+        self.__capacidade = capacidade
+        self.__bloqueante = bloqueante
+        self.__dados = [None] * (capacidade or self.CAPACIDADE_INICIAL)
+        self.__inicio = 0
+        self.__tamanho = 0
+        # Sincronização apenas para filas bloqueantes (produtor/consumidor entre threads)
+        self.__condicao = threading.Condition() if bloqueante else None
+
+    def __len__(self)->int:
+        return self.__tamanho
+
+    def esta_vazia(self):
+        return self.__tamanho == 0
+
+    def esta_cheia(self)->bool:
+        return self.__capacidade is not None and self.__tamanho == self.__capacidade
+
+    def frente(self)->any:
+        '''
+        Método que retorna a carga armazenada na frente da fila
+        '''
+        if self.esta_vazia():
+            raise FilaError('Fila está vazia')
+        return self.__dados[self.__inicio]
+
+    def elemento(self, posicao:int)->any:
+        '''
+        Método que recebe a posição de um elemento da fila que deseja
+        consultar. Retorna a carga armazenada na posição específica.
+        A posicao retornada é em direição da base para o topo (mesma
+        convenção da FilaEncadeada), em tempo constante.
+        '''
+        if not 0 < posicao <= len(self):
+            raise FilaError(f'Posicao invalida. A fila no momento possui {len(self)} elementos.')
+        return self.__dados[(self.__inicio + len(self) - posicao) % len(self.__dados)]
+
+    def busca(self, chave:any)->int:
+        '''
+        Método que recebe uma chave de busca e retorna a posição em
+        que a carga foi encontrada na fila
+        '''
+        for contador in range(self.__tamanho):
+            if self.__dados[(self.__inicio + contador) % len(self.__dados)] == chave:
+                return contador + 1
+        raise FilaError(f"Chave {chave} não encontrada")
+
+    def enfileira(self, carga:any, timeout:float = None):
+        '''
+        Insere a carga no final da fila. Se a fila tiver capacidade limitada
+        e estiver cheia, espera por espaço (fila bloqueante, até "timeout"
+        segundos) ou gera FilaError.
+        '''
+        if self.__condicao is None:
+            self.__espera_espaco(1, timeout)
+            self.__insere(carga)
+            return
+        with self.__condicao:
+            self.__espera_espaco(1, timeout)
+            self.__insere(carga)
+            self.__condicao.notify_all()
+
+    def enfileira_varios(self, cargas:list, timeout:float = None):
+        '''
+        Insere várias cargas no final da fila, na ordem dada. Em uma fila
+        limitada e não bloqueante, nenhuma carga é inserida se não houver
+        espaço para todas. Em uma fila bloqueante, as cargas são inseridas
+        à medida que houver espaço.
+        '''
+        cargas = list(cargas)
+        if self.__condicao is None:
+            self.__espera_espaco(len(cargas), timeout)
+            for carga in cargas:
+                self.__insere(carga)
+            return
+        with self.__condicao:
+            for carga in cargas:
+                self.__espera_espaco(1, timeout)
+                self.__insere(carga)
+                self.__condicao.notify_all()
+
+    def desenfileira(self, timeout:float = None)->any:
+        '''
+        Remove e retorna a carga da frente da fila. Em uma fila bloqueante,
+        espera por um elemento (até "timeout" segundos) antes de gerar FilaError.
+        '''
+        if self.__condicao is None:
+            if self.__tamanho == 0:
+                raise FilaError('Fila está vazia')
+            return self.__remove()
+        with self.__condicao:
+            self.__espera_elemento(timeout)
+            carga = self.__remove()
+            self.__condicao.notify_all()
+            return carga
+
+    def desenfileira_varios(self, quantidade:int = None, timeout:float = None)->list:
+        '''
+        Remove e retorna, em uma lista, até "quantidade" cargas da frente da
+        fila (todas, se "quantidade" não for informada). Em uma fila
+        bloqueante, espera até haver ao menos um elemento.
+        '''
+        if self.__condicao is None:
+            self.__espera_elemento(timeout)
+            return self.__remove_varios(quantidade)
+        with self.__condicao:
+            self.__espera_elemento(timeout)
+            cargas = self.__remove_varios(quantidade)
+            self.__condicao.notify_all()
+            return cargas
+
+    def esvaziar(self):
+        if self.__condicao is None:
+            self.__reinicia()
+            return
+        with self.__condicao:
+            self.__reinicia()
+            self.__condicao.notify_all()
+
+    def __str__(self)->str:
+        s = 'inicio->[ '
+        for contador in range(self.__tamanho):
+            s += f'{self.__dados[(self.__inicio + contador) % len(self.__dados)]}, '
+
+        s = s.strip(', ')
+        s += ' ]<-fim'
+        return s
+
+    def combina(self, fila1:'Fila', fila2:'Fila' ):
+        '''
+        Insere nesta fila os elementos de "fila1" e "fila2", intercalados,
+        esvaziando as duas filas.
+        '''
+        while( not fila1.esta_vazia() and not fila2.esta_vazia()):
+            self.enfileira(fila1.desenfileira())
+            self.enfileira(fila2.desenfileira())
+        if not fila1.esta_vazia():
+            self.enfileira_varios(fila1.desenfileira_varios())
+        if not fila2.esta_vazia():
+            self.enfileira_varios(fila2.desenfileira_varios())
+
+    def __espera_espaco(self, quantidade:int, timeout:float):
+        if self.__capacidade is None:
+            self.__garante_espaco(self.__tamanho + quantidade)
+            return
+        if self.__bloqueante:
+            self.__condicao.wait_for(lambda: self.__tamanho + quantidade <= self.__capacidade, timeout)
+        if self.__tamanho + quantidade > self.__capacidade:
+            raise FilaError('Fila está cheia')
+
+    def __espera_elemento(self, timeout:float):
+        if self.__bloqueante:
+            self.__condicao.wait_for(lambda: self.__tamanho > 0, timeout)
+        if self.__tamanho == 0:
+            raise FilaError('Fila está vazia')
+
+    def __garante_espaco(self, necessario:int):
+        '''
+        Dobra o buffer (fila sem limite) até caber "necessario" elementos,
+        reposicionando-os a partir do índice 0.
+        '''
+        if necessario <= len(self.__dados):
+            return
+        tamanho_novo = len(self.__dados)
+        while tamanho_novo < necessario:
+            tamanho_novo *= 2
+        fim = self.__inicio + self.__tamanho
+        dados = self.__dados[self.__inicio:fim] + self.__dados[:max(0, fim - len(self.__dados))]
+        self.__dados = dados + [None] * (tamanho_novo - len(dados))
+        self.__inicio = 0
+
+    def __insere(self, carga:any):
+        self.__dados[(self.__inicio + self.__tamanho) % len(self.__dados)] = carga
+        self.__tamanho += 1
+
+    def __remove_varios(self, quantidade:int)->list:
+        '''
+        Remove até "quantidade" cargas copiando fatias contíguas do buffer
+        (no máximo duas, quando os elementos dão a volta no final).
+        '''
+        quantidade = self.__tamanho if quantidade is None else min(quantidade, self.__tamanho)
+        fim = self.__inicio + quantidade
+        cargas = self.__dados[self.__inicio:fim]
+        self.__dados[self.__inicio:fim] = [None] * len(cargas)
+        if fim > len(self.__dados):
+            resto = fim - len(self.__dados)
+            cargas += self.__dados[:resto]
+            self.__dados[:resto] = [None] * resto
+        self.__inicio = fim % len(self.__dados)
+        self.__tamanho -= quantidade
+        return cargas
+
+    def __reinicia(self):
+        self.__dados = [None] * (self.__capacidade or self.CAPACIDADE_INICIAL)
+        self.__inicio = 0
+        self.__tamanho = 0
+
+    def __remove(self)->any:
+        carga = self.__dados[self.__inicio]
+        self.__dados[self.__inicio] = None
+        self.__inicio = (self.__inicio + 1) % len(self.__dados)
+        self.__tamanho -= 1
+        return carga
+
+
+if __name__ == '__main__':
+    # Micro-benchmark: compara a Fila (buffer circular) com a FilaEncadeada.
+    # Uso: python -m ds.queue [quantidade de mensagens] (padrão: 1 milhão)
+    import sys
+    import time
+
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    mensagens = [f'mensagem {i}' for i in range(total)]
+
+    def mede(descricao:str, operacao):
+        inicio = time.perf_counter()
+        operacao()
+        print(f'{descricao}: {time.perf_counter() - inicio:.3f} s')
+
+    for classe in (FilaEncadeada, Fila):
+        fila = classe()
+        mede(f'{classe.__name__}.enfileira x{total}', lambda: [fila.enfileira(m) for m in mensagens])
+        mede(f'{classe.__name__}.elemento x1000', lambda: [fila.elemento(p) for p in range(1, total + 1, max(1, total // 1000))])
+        mede(f'{classe.__name__}.desenfileira x{total}', lambda: [fila.desenfileira() for _ in range(total)])
+
+    fila = Fila()
+    mede(f'Fila.enfileira_varios x{total}', lambda: fila.enfileira_varios(mensagens))
+    mede(f'Fila.desenfileira_varios x{total}', lambda: fila.desenfileira_varios())
@@ -0,0 +1,215 @@
+# Cópia gerada de server/ds/shm_ring.py (tudo antes do bloco "__main__"): não edite aqui.
+# Cliente e servidor rodam de pastas separadas, cada um com o seu pacote "ds"; o teste
+# server/tests/test_shm_ring.py falha se esta cópia deixar de ser igual à original.
+import os
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+
+class ShmRing:
+    '''
+    Buffer circular de um produtor e um consumidor sobre um trecho de
+    memória compartilhada entre processos.
+
+    O cabeçalho guarda dois contadores crescentes de 64 bits: "head"
+    (bytes já consumidos, gravado só pelo consumidor) e "tail" (bytes já
+    produzidos, gravado só pelo produtor), além de uma flag de canal
+    encerrado. Cada mensagem é gravada como 4 bytes de tamanho seguidos do
+    conteúdo; mensagens maiores que o buffer passam em partes, à medida
+    que o consumidor libera espaço.
+
+    Não há primitiva de espera entre processos: quem espera gira por
+    alguns ciclos e depois dorme por intervalos crescentes (até
+    MAX_SLEEP), de modo que um produtor em alta taxa é atendido sem
+    chamadas ao sistema e um canal ocioso consome pouca CPU. Com uma única
+    CPU disponível, girar só atrasaria o outro processo; nesse caso os
+    ciclos cedem a CPU (sched_yield) em vez de girar.
+    '''
+
+    HEADER = struct.Struct('<QQB')  # head, tail, encerrado
+    HEADER_SIZE = 64
+    LENGTH = struct.Struct('<I')
+    SPINS = 2000
+    MAX_SLEEP = 0.001
+    YIELD = len(os.sched_getaffinity(0)) == 1 if hasattr(os, 'sched_getaffinity') else os.cpu_count() == 1
+
+    def __init__(self, buffer: memoryview, offset: int, capacity: int):
+        '''
+        Args:
+        buffer (memoryview): A memória compartilhada.
+        offset (int): Início do cabeçalho do buffer dentro da memória.
+        capacity (int): Bytes de dados do buffer (logo após o cabeçalho).
+        '''
+        self.__buffer = buffer
+        self.__header = offset
+        self.__data = offset + self.HEADER_SIZE
+        self.capacity = capacity
+
+    def is_closed(self) -> bool:
+        return bool(self.__buffer[self.__header + 16])
+
+    def close(self):
+        self.__buffer[self.__header + 16] = 1
+
+    def write(self, buffers: list):
+        '''
+        Grava uma mensagem formada pelos buffers, em sequência, esperando por
+        espaço quando o buffer circular está cheio.
+        '''
+        # Uma única cópia para o buffer circular: o leitor vê a mensagem de uma vez
+        self.__write_bytes(b''.join([self.LENGTH.pack(sum(len(buffer) for buffer in buffers))] + buffers))
+
+    def read(self, timeout: float = None) -> bytes:
+        '''
+        Lê a próxima mensagem. Retorna None se nenhuma mensagem começar dentro de
+        "timeout" segundos (None espera indefinidamente).
+        '''
+        if not self.__wait_for(lambda: self.__used() > 0, timeout):
+            return None
+        length = self.LENGTH.unpack(self.__read_bytes(self.LENGTH.size))[0]
+        return self.__read_bytes(length)
+
+    def __counters(self) -> tuple:
+        head, tail, _ = self.HEADER.unpack_from(self.__buffer, self.__header)
+        return head, tail
+
+    def __used(self) -> int:
+        head, tail = self.__counters()
+        return tail - head
+
+    def __write_bytes(self, data: bytes):
+        data = memoryview(data).cast('B')
+        written = 0
+        while written < len(data):
+            self.__wait_for(lambda: self.__used() < self.capacity)
+            head, tail = self.__counters()
+            count = min(len(data) - written, self.capacity - (tail - head))
+            start = tail % self.capacity
+            first = min(count, self.capacity - start)
+            self.__buffer[self.__data + start:self.__data + start + first] = data[written:written + first]
+            self.__buffer[self.__data:self.__data + count - first] = data[written + first:written + count]
+            struct.pack_into('<Q', self.__buffer, self.__header + 8, tail + count)  # Publica depois de copiar
+            written += count
+
+    def __read_bytes(self, size: int) -> bytes:
+        chunks = []
+        remaining = size
+        while remaining:
+            self.__wait_for(lambda: self.__used() > 0)
+            head, tail = self.__counters()
+            count = min(remaining, tail - head)
+            start = head % self.capacity
+            first = min(count, self.capacity - start)
+            chunks.append(bytes(self.__buffer[self.__data + start:self.__data + start + first]))
+            if count > first:
+                chunks.append(bytes(self.__buffer[self.__data:self.__data + count - first]))
+            struct.pack_into('<Q', self.__buffer, self.__header, head + count)  # Libera depois de copiar
+            remaining -= count
+        return b''.join(chunks)
+
+    def __wait_for(self, ready, timeout: float = None) -> bool:
+        '''
+        Espera até "ready()" ser verdadeiro: gira por SPINS ciclos e depois dorme
+        por intervalos crescentes. Levanta ConnectionResetError se o canal for encerrado.
+        '''
+        spins = 0
+        sleep = 0.00001
+        limit = None if timeout is None else time.monotonic() + timeout
+        while not ready():
+            if self.is_closed():
+                raise ConnectionResetError("canal de memória compartilhada encerrado")
+            if spins < self.SPINS:
+                spins += 1
+                if self.YIELD:
+                    os.sched_yield()
+                continue
+            if limit is not None and time.monotonic() >= limit:
+                return False
+            time.sleep(sleep)
+            sleep = min(sleep * 2, self.MAX_SLEEP)
+        return True
+
+
+class ShmChannel:
+    '''
+    Canal de requisição e resposta entre dois processos do mesmo host,
+    formado por dois ShmRing em um único bloco de memória compartilhada
+    (multiprocessing.shared_memory): um para as requisições do cliente e
+    outro para as respostas do servidor.
+
+    O servidor cria o canal ("create") e informa o nome do bloco ao
+    cliente, que se conecta a ele ("attach"). Os métodos "sendall" e
+    "recv" imitam os de um socket, para que o cliente use o canal no
+    lugar da conexão; "recv" devolve sempre uma resposta inteira.
+    '''
+
+    def __init__(self, memory: shared_memory.SharedMemory, capacity: int, owner: bool):
+        self.memory = memory
+        self.name = memory.name
+        self.capacity = capacity
+        self.owner = owner
+        self.__lock = threading.Lock()
+        requests = ShmRing(memory.buf, 0, capacity)
+        responses = ShmRing(memory.buf, ShmRing.HEADER_SIZE + capacity, capacity)
+        self.__incoming, self.__outgoing = (requests, responses) if owner else (responses, requests)
+
+    @classmethod
+    def create(cls, capacity: int = 1 << 20) -> 'ShmChannel':
+        ''' Cria o bloco de memória compartilhada do canal (lado do servidor). '''
+        memory = shared_memory.SharedMemory(create=True, size=2 * (ShmRing.HEADER_SIZE + capacity))
+        memory.buf[:2 * ShmRing.HEADER_SIZE] = bytes(2 * ShmRing.HEADER_SIZE)
+        memory.buf[ShmRing.HEADER_SIZE + capacity:2 * ShmRing.HEADER_SIZE + capacity] = bytes(ShmRing.HEADER_SIZE)
+        return cls(memory, capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, capacity: int) -> 'ShmChannel':
+        ''' Conecta-se a um canal criado pelo servidor (lado do cliente). '''
+        memory = shared_memory.SharedMemory(name=name)
+        # Quem remove o bloco é o servidor; sem isto o resource_tracker do cliente o removeria ao sair
+        resource_tracker.unregister(memory._name, 'shared_memory')
+        return cls(memory, capacity, owner=False)
+
+    def send(self, buffers: list):
+        self.__outgoing.write(buffers)
+
+    def receive(self, timeout: float = None) -> bytes:
+        return self.__incoming.read(timeout)
+
+    def sendall(self, data: bytes):
+        self.send([data])
+
+    def recv(self, size: int = None) -> bytes:
+        return self.receive()
+
+    def is_closed(self) -> bool:
+        return self.__incoming is None or self.__incoming.is_closed()
+
+    def shutdown(self):
+        '''
+        Marca o canal como encerrado nos dois sentidos, fazendo o outro lado (e
+        quem estiver esperando neste) receber ConnectionResetError. Pode ser
+        chamado de qualquer thread.
+        '''
+        with self.__lock:
+            if self.__incoming is not None:
+                self.__incoming.close()
+                self.__outgoing.close()
+
+    def close(self):
+        '''
+        Encerra o canal e libera o mapeamento; o servidor, dono do bloco, também
+        o remove do sistema. Deve ser chamado pela thread que usa o canal, depois
+        que ela deixou de ler e gravar.
+        '''
+        with self.__lock:
+            if self.__incoming is None:
+                return
+            self.__incoming.close()
+            self.__outgoing.close()
+            self.__incoming = self.__outgoing = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
@@ -0,0 +1,97 @@
+import json
+import os
+from ds.queue import Fila, FilaError
+
+
+class FilaPersistente(Fila):
+    '''
+    Fila cujas operações são registradas em um arquivo de spool
+    (append-only), de modo que os elementos sobrevivem ao fim do
+    processo. Cada linha do arquivo é um registro JSON: "E" para uma
+    carga enfileirada e "D" para a quantidade de cargas removidas.
+
+    Ao abrir, o arquivo é reproduzido para reconstruir a fila e então
+    compactado (apenas as cargas pendentes são regravadas). Quando a fila
+    fica vazia, o arquivo é truncado. As cargas devem ser serializáveis
+    em JSON.
+    '''
+    def __init__(self, caminho:str):
+        super().__init__()
+        self.caminho = caminho
+        super().enfileira_varios(self.__le_spool())
+        self.__compacta()
+        self.__arquivo = open(caminho, 'a', encoding='utf-8')
+
+    def enfileira(self, carga:any, timeout:float = None):
+        self.__registra([{'op': 'E', 'carga': carga}])
+        super().enfileira(carga, timeout)
+
+    def enfileira_varios(self, cargas:list, timeout:float = None):
+        cargas = list(cargas)
+        self.__registra([{'op': 'E', 'carga': carga} for carga in cargas])
+        super().enfileira_varios(cargas, timeout)
+
+    def desenfileira(self, timeout:float = None)->any:
+        carga = super().desenfileira(timeout)
+        self.__registra_remocao(1)
+        return carga
+
+    def desenfileira_varios(self, quantidade:int = None, timeout:float = None)->list:
+        cargas = super().desenfileira_varios(quantidade, timeout)
+        self.__registra_remocao(len(cargas))
+        return cargas
+
+    def esvaziar(self):
+        super().esvaziar()
+        self.__trunca()
+
+    def fecha(self):
+        self.__arquivo.close()
+
+    def __le_spool(self)->list:
+        '''
+        Reproduz o arquivo de spool e retorna as cargas pendentes. Uma
+        última linha incompleta (gravação interrompida) é ignorada.
+        '''
+        if not os.path.exists(self.caminho):
+            return []
+        cargas = Fila()
+        with open(self.caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    break
+                if registro['op'] == 'E':
+                    cargas.enfileira(registro['carga'])
+                elif not cargas.esta_vazia():
+                    cargas.desenfileira_varios(registro['n'])
+        return cargas.desenfileira_varios() if not cargas.esta_vazia() else []
+
+    def __compacta(self):
+        temporario = self.caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            for posicao in range(len(self), 0, -1):
+                arquivo.write(json.dumps({'op': 'E', 'carga': self.elemento(posicao)}) + '\n')
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, self.caminho)
+
+    def __registra(self, registros:list):
+        try:
+            self.__arquivo.write(''.join(json.dumps(registro) + '\n' for registro in registros))
+            self.__arquivo.flush()
+            os.fsync(self.__arquivo.fileno())
+        except (OSError, TypeError) as e:
+            raise FilaError(f'Falha ao gravar o spool {self.caminho}: {str(e)}')
+
+    def __registra_remocao(self, quantidade:int):
+        if self.esta_vazia():
+            self.__trunca()
+        elif quantidade:
+            self.__registra([{'op': 'D', 'n': quantidade}])
+
+    def __trunca(self):
+        self.__arquivo.truncate(0)
+        self.__arquivo.flush()
+        os.fsync(self.__arquivo.fileno())
@@ -0,0 +1,176 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Balde de fichas (token bucket) usado para limitar a taxa de requisições.
+
+    O balde é reabastecido continuamente a "rate" fichas por segundo, até o
+    máximo de "capacity". O saldo pode ficar negativo quando um custo é cobrado
+    depois do fato (tamanho da resposta), o que atrasa as próximas admissões
+    até que a dívida seja paga.
+    """
+
+    def __init__(self, rate: float, capacity: float, thread_safe: bool = False) -> None:
+        """
+        Args:
+        rate (float): Fichas adicionadas por segundo.
+        capacity (float): Quantidade máxima de fichas acumuladas (rajada).
+        thread_safe (bool): Protege o saldo com um lock (necessário para baldes globais).
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock() if thread_safe else None
+
+    def __refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, cost: float = 1) -> bool:
+        """
+        Consome "cost" fichas se houver saldo suficiente.
+
+        Returns:
+        bool: True se a requisição foi admitida, False caso contrário.
+        """
+        if self.lock:
+            with self.lock:
+                return self.__try_acquire(cost)
+        return self.__try_acquire(cost)
+
+    def __try_acquire(self, cost: float) -> bool:
+        self.__refill()
+        if self.tokens < cost:
+            return False
+        self.tokens -= cost
+        return True
+
+    def has_credit(self) -> bool:
+        """Retorna True se o balde não está em dívida."""
+        if self.lock:
+            with self.lock:
+                self.__refill()
+                return self.tokens > 0
+        self.__refill()
+        return self.tokens > 0
+
+    def charge(self, cost: float) -> None:
+        """Cobra "cost" fichas, mesmo que o saldo fique negativo."""
+        if self.lock:
+            with self.lock:
+                self.__refill()
+                self.tokens -= cost
+            return
+        self.__refill()
+        self.tokens -= cost
+
+    def retry_after(self) -> float:
+        """Segundos estimados até que o balde tenha ao menos uma ficha."""
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class ConnectionLimits:
+    """
+    Baldes de uma conexão: um balde de requisições por classe de comando e um
+    balde de bytes de resposta para os comandos de leitura.
+    """
+
+    def __init__(self, request_rates: dict, read_bytes_rate: float, read_bytes_burst: float) -> None:
+        self.requests = {cls: TokenBucket(rate, burst) for cls, (rate, burst) in request_rates.items()}
+        self.read_bytes = TokenBucket(read_bytes_rate, read_bytes_burst)
+
+
+class AdmissionController:
+    """
+    Controle de admissão do servidor.
+
+    - Limita o número de conexões simultâneas.
+    - Limita, por conexão, a taxa de requisições de cada classe de comando
+      ("read" para consultas e "write" para alterações), de modo que um cliente
+      que só faz LIST não consome a cota de ADD/COMPLETE.
+    - Cobra o custo das respostas de leitura em bytes, por conexão e globalmente.
+    - Limita quantos comandos caros (listagens completas) executam ao mesmo tempo.
+
+    Quando um limite é atingido a requisição é rejeitada imediatamente, sem
+    executar o comando.
+    """
+
+    READ_COMMANDS = {"LIST", "LIST_DETAILED", "TASK_HISTORY", "LIST_SUBTASKS", "SEARCH", "SUMMARY", "LIST_OVERDUE", "SLOW_LOG"}
+    EXPENSIVE_COMMANDS = {"LIST", "LIST_DETAILED", "TASK_HISTORY"}
+
+    def __init__(self,
+                 max_connections: int = 128,
+                 max_expensive_in_flight: int = 8,
+                 request_rates: dict = None,
+                 read_bytes_rate: float = 1 << 20,
+                 read_bytes_burst: float = 4 << 20,
+                 global_read_bytes_rate: float = 16 << 20,
+                 global_read_bytes_burst: float = 64 << 20) -> None:
+        """
+        Args:
+        max_connections (int): Conexões simultâneas permitidas.
+        max_expensive_in_flight (int): Comandos caros executando ao mesmo tempo em todo o servidor.
+        request_rates (dict): Por classe de comando, uma tupla (requisições por segundo, rajada).
+        read_bytes_rate (float): Bytes de resposta de leitura por segundo, por conexão.
+        read_bytes_burst (float): Rajada de bytes de resposta de leitura, por conexão.
+        global_read_bytes_rate (float): Bytes de resposta de leitura por segundo, somando todas as conexões.
+        global_read_bytes_burst (float): Rajada global de bytes de resposta de leitura.
+        """
+        self.max_connections = max_connections
+        self.request_rates = request_rates or {'read': (20, 40), 'write': (100, 200)}
+        self.read_bytes_rate = read_bytes_rate
+        self.read_bytes_burst = read_bytes_burst
+        self.global_read_bytes = TokenBucket(global_read_bytes_rate, global_read_bytes_burst, thread_safe=True)
+        self.expensive_slots = threading.BoundedSemaphore(max_expensive_in_flight)
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def admit_connection(self) -> bool:
+        """Reserva uma vaga de conexão. Retorna False se o servidor está lotado."""
+        with self.lock:
+            if self.connections >= self.max_connections:
+                return False
+            self.connections += 1
+            return True
+
+    def release_connection(self) -> None:
+        with self.lock:
+            self.connections -= 1
+
+    def connection_limits(self) -> ConnectionLimits:
+        """Cria os baldes de uma nova conexão."""
+        return ConnectionLimits(self.request_rates, self.read_bytes_rate, self.read_bytes_burst)
+
+    def command_class(self, action: str) -> str:
+        return 'read' if action in self.READ_COMMANDS else 'write'
+
+    def admit(self, limits: ConnectionLimits, action: str) -> str:
+        """
+        Decide se um comando pode ser executado.
+
+        Returns:
+        str: None se o comando foi admitido, ou a mensagem de rejeição.
+        """
+        bucket = limits.requests[self.command_class(action)]
+        if not bucket.try_acquire():
+            return f"Erro: limite de requisições excedido. Tente novamente em {bucket.retry_after():.2f}s."
+
+        if self.command_class(action) == 'read':
+            if not limits.read_bytes.has_credit() or not self.global_read_bytes.has_credit():
+                return "Erro: limite de volume de respostas excedido. Tente novamente mais tarde."
+
+        if action in self.EXPENSIVE_COMMANDS and not self.expensive_slots.acquire(blocking=False):
+            return "Erro: servidor ocupado com outras listagens. Tente novamente mais tarde."
+        return None
+
+    def complete(self, limits: ConnectionLimits, action: str, response_size: int) -> None:
+        """Registra o fim de um comando admitido, cobrando o custo da resposta."""
+        if action in self.EXPENSIVE_COMMANDS:
+            self.expensive_slots.release()
+        if self.command_class(action) == 'read':
+            limits.read_bytes.charge(response_size)
+            self.global_read_bytes.charge(response_size)
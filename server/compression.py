@@ -0,0 +1,118 @@
+import struct
+import time
+import zlib
+
+
+class ResponseCompressor:
+    """
+    Compressão das respostas de uma conexão, ativada pelo cliente com "COMPRESS ON".
+
+    Depois de ativada, cada resposta é enviada em um quadro: 1 byte de tipo ("Z" para
+    comprimida, "R" para sem compressão) e 4 bytes com o tamanho do conteúdo (big-endian),
+    seguidos do conteúdo. Só as respostas a partir de "threshold" bytes são comprimidas.
+
+    As respostas comprimidas formam um único fluxo deflate (sem cabeçalho zlib) que dura
+    toda a conexão: cada resposta termina com Z_SYNC_FLUSH, para que o cliente possa
+    descomprimi-la assim que a recebe, e a janela de histórico aproveita as respostas
+    anteriores. O fluxo começa com um dicionário com os rótulos das respostas, enviado
+    ao cliente na negociação.
+    """
+
+    FRAME = struct.Struct('>cI')  # Tipo, tamanho do conteúdo
+    COMPRESSED = b'Z'
+    RAW = b'R'
+    DEFAULT_THRESHOLD = 512
+
+    # Trechos mais frequentes ficam no fim do dicionário, onde custam menos para referenciar
+    DICTIONARY = (
+        "Nenhuma tarefa não concluída encontrada.Nenhuma tarefa encontrada.Tarefas atrasadas:\n"
+        "Resumo das tarefas:\nVencimento das não concluídas: Lote com  comandos:\n"
+        "Tarefas não concluídas (com subtarefas):\n"
+        "Histórico de Tarefas:\nTarefas não concluídas:\n"
+        ", Prioridade: ALTA, Prioridade: MEDIA, Vencimento: Sem vencimento, Subtarefas: "
+        "  Subtarefas ( concluídas):\n    - ID: , Descrição: , Concluída: False\n\n"
+        "ID: , Descrição: , Vencimento: 2024-, Concluída: True\n\n"
+        "\nID: , Descrição: , Vencimento: 2025-, Prioridade: BAIXA, Concluída: False"
+        "\nID: , Descrição: , Concluída: True"
+        "\nID: , Descrição: , Concluída: False"
+    ).encode()
+
+    def __init__(self, threshold: int = DEFAULT_THRESHOLD, level: int = 6) -> None:
+        """
+        Args:
+        threshold (int): Tamanho mínimo, em bytes, de uma resposta para ela ser comprimida.
+        level (int): Nível de compressão do zlib (1 a 9).
+        """
+        self.threshold = threshold
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=self.DICTIONARY)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_time = 0.0
+
+    def frame(self, buffers: list) -> list:
+        """
+        Enquadra uma resposta, comprimindo-a se ela atingir o limite de tamanho.
+
+        Args:
+        buffers (list): Os buffers (bytes) da resposta.
+
+        Returns:
+        list: Os buffers a serem enviados, começando pelo cabeçalho do quadro.
+        """
+        size = sum(len(buffer) for buffer in buffers)
+        if size < self.threshold:
+            return [self.FRAME.pack(self.RAW, size)] + buffers
+
+        started = time.thread_time()
+        compressed = [self.compressor.compress(buffer) for buffer in buffers]
+        compressed.append(self.compressor.flush(zlib.Z_SYNC_FLUSH))
+        self.cpu_time += time.thread_time() - started
+
+        compressed_size = sum(len(chunk) for chunk in compressed)
+        self.bytes_in += size
+        self.bytes_out += compressed_size
+        return [self.FRAME.pack(self.COMPRESSED, compressed_size)] + compressed
+
+    def stats(self) -> str:
+        """Resume a compressão da conexão: volume, razão e tempo de CPU gasto."""
+        ratio = self.bytes_in / self.bytes_out if self.bytes_out else 0.0
+        return (f"Compressão ativa (limite: {self.threshold} bytes). Comprimidos: {self.bytes_in} -> {self.bytes_out} bytes "
+                f"(razão {ratio:.2f}), CPU: {self.cpu_time * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    # Benchmark: razão de compressão e custo de CPU das listagens, com e sem o dicionário.
+    # Uso: python compression.py [quantidade de tarefas] (padrão: 10 mil)
+    import sys
+    from server import TaskServer
+
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    server = TaskServer()
+    for task_id in range(1, total + 1):
+        server.add_task(f"Tarefa número {task_id} do projeto", "2024-10-10" if task_id % 3 else None,
+                        ("ALTA", "MEDIA", "BAIXA")[task_id % 3])
+        if task_id % 4 == 0:
+            server.add_subtask(task_id, "Revisar")
+            server.add_subtask(task_id, "Enviar")
+        if task_id % 5 == 0:
+            server.complete_task(task_id)
+
+    for command in ("TASK_HISTORY", "LIST_DETAILED", "LIST"):
+        buffers = getattr(server, server.BUFFERED_COMMANDS[command])()
+        size = sum(len(buffer) for buffer in buffers)
+        for label, zdict in (("sem dicionário", None), ("com dicionário", ResponseCompressor.DICTIONARY)):
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS, **({'zdict': zdict} if zdict else {}))
+            started = time.process_time()
+            compressed = sum(len(compressor.compress(buffer)) for buffer in buffers) + len(compressor.flush(zlib.Z_SYNC_FLUSH))
+            cpu = time.process_time() - started
+            print(f"{command} ({size:,} bytes) {label}: {compressed:,} bytes, razão {size / compressed:.2f}, "
+                  f"CPU {cpu * 1000:.2f} ms ({size / max(cpu, 1e-9) / 2**20:.0f} MB/s)")
+
+    # Respostas pequenas (uma tarefa) comprimidas isoladamente e no fluxo da conexão
+    replies = [server.process_command(f"SEARCH {task_id}").encode() for task_id in range(1, min(total, 1000) + 1)]
+    size = sum(len(reply) for reply in replies)
+    isolated = sum(len(zlib.compress(reply)) for reply in replies)
+    stream = ResponseCompressor(threshold=0)
+    streamed = sum(len(b''.join(stream.frame([reply])[1:])) for reply in replies)
+    print(f"{len(replies)} respostas de SEARCH ({size:,} bytes): isoladas {isolated:,} bytes, "
+          f"em fluxo com dicionário {streamed:,} bytes (razão {size / streamed:.2f})")
@@ -112,6 +112,25 @@ class AVLTree(object):
         else:
             return None
 
+    def update(self, task: dict):
+        '''
+        Replaces the object/value stored at the node whose key is task['id'].
+        The tasks kept in memory are already updated in place, so this only
+        keeps the interface compatible with disk-backed stores.
+        '''
+        node = self.__searchData(task['id'], self.__root)
+        if node is None:
+            raise KeyError(task['id'])
+        node.value = task
+
+    def getMax(self)->any:
+        '''
+        Method that returns the object/value stored on the node with the
+        greatest key, or None if the AVL Tree is empty.
+        '''
+        node = self.__getMaxValueNode(self.__root)
+        return None if node is None else node.value
+
     def __searchData(self, key: any, node: Node) -> Node:
         """
         Método privado que realiza a busca recursiva na AVL Tree para encontrar o nó
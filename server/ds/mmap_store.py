@@ -0,0 +1,728 @@
+import functools
+import json
+import mmap
+import os
+import shutil
+import struct
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from datetime import date
+
+
+class StoreNode:
+    '''
+    Nó leve entregue ao callback de "inorder", espelhando o atributo
+    "value" do Node da AVL Tree para que o TaskServer trate os dois
+    armazenamentos da mesma forma.
+    '''
+    __slots__ = ('value',)
+
+    def __init__(self, value: dict):
+        self.value = value
+
+
+class StoreSubtasks(MutableMapping):
+    '''
+    Subtarefas de uma tarefa do MMapTaskStore, vistas pelo TaskServer como o
+    dicionário "ID -> subtarefa" da AVL Tree.
+
+    Os registros ficam no heap em um vetor ordenado por ID, então uma
+    subtarefa é achada por busca binária, sem ler as demais. As alterações
+    feitas pelo servidor ficam pendentes aqui e "MMapTaskStore.update" grava
+    só elas: incluir, concluir ou remover uma subtarefa custa O(1) registros.
+    '''
+
+    def __init__(self, heap, offset: int, count: int, live: int):
+        """
+        Args:
+        heap: Mapeamento do heap no momento da leitura da tarefa.
+        offset (int): Posição do vetor de registros no heap.
+        count (int): Registros usados no vetor (incluindo os removidos).
+        live (int): Subtarefas não removidas.
+        """
+        self.reset(heap, offset, count, live)
+
+    def reset(self, heap, offset: int, count: int, live: int):
+        ''' Aponta para o vetor gravado e descarta as alterações pendentes (já gravadas pelo armazenamento). '''
+        self.heap, self.offset, self.count, self.live = heap, offset, count, live
+        self.added = {}    # ID -> subtarefa nova, ainda não gravada
+        self.removed = {}  # ID -> índice do registro a marcar como removido
+        self.loaded = {}   # ID -> (índice do registro, subtarefa lida), para gravar as alterações feitas nela
+
+    def find(self, subtask_id: int) -> int:
+        ''' Índice do registro vivo com o ID, ou None. '''
+        low, high = 0, self.count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            record_id, flags = self.__record(middle)[:2]
+            if record_id == subtask_id:
+                return None if flags & MMapTaskStore.FLAG_DELETED else middle
+            if record_id < subtask_id:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None
+
+    def __record(self, index: int) -> tuple:
+        return MMapTaskStore.SUBTASK.unpack_from(self.heap, self.offset + index * MMapTaskStore.SUBTASK.size)
+
+    def __item(self, record: tuple) -> dict:
+        subtask_id, flags, desc_off, desc_len = record
+        return {'id': subtask_id, 'description': self.heap[desc_off:desc_off + desc_len].decode(),
+                'completed': bool(flags & MMapTaskStore.FLAG_COMPLETED)}
+
+    def __stored_index(self, subtask_id: int) -> int:
+        return None if subtask_id in self.removed else self.find(subtask_id)
+
+    def __getitem__(self, subtask_id: int) -> dict:
+        if subtask_id in self.added:
+            return self.added[subtask_id]
+        if subtask_id in self.loaded:
+            return self.loaded[subtask_id][1]
+        index = self.__stored_index(subtask_id)
+        if index is None:
+            raise KeyError(subtask_id)
+        item = self.__item(self.__record(index))
+        self.loaded[subtask_id] = (index, item)  # O servidor pode alterar a subtarefa devolvida
+        return item
+
+    def __setitem__(self, subtask_id: int, subtask: dict):
+        index = self.__stored_index(subtask_id)
+        if index is None:
+            self.added[subtask_id] = subtask
+        else:
+            self.loaded[subtask_id] = (index, subtask)
+
+    def __delitem__(self, subtask_id: int):
+        if self.added.pop(subtask_id, None) is not None:
+            return
+        index = self.__stored_index(subtask_id)
+        if index is None:
+            raise KeyError(subtask_id)
+        self.loaded.pop(subtask_id, None)
+        self.removed[subtask_id] = index
+
+    def __iter__(self):
+        for subtask in self.values():
+            yield subtask['id']
+
+    def __len__(self) -> int:
+        return self.live - len(self.removed) + len(self.added)
+
+    def values(self) -> list:
+        ''' Subtarefas em ordem de ID (a ordem de inserção, como na AVL Tree), lidas em uma passada. '''
+        result = []
+        end = self.offset + self.count * MMapTaskStore.SUBTASK.size
+        for record in MMapTaskStore.SUBTASK.iter_unpack(self.heap[self.offset:end]):
+            if record[1] & MMapTaskStore.FLAG_DELETED or record[0] in self.removed:
+                continue
+            result.append(self.loaded[record[0]][1] if record[0] in self.loaded else self.__item(record))
+        return result + list(self.added.values())
+
+
+class MMapTaskStore:
+    '''
+    Armazenamento de tarefas em disco, mapeado em memória (mmap), que
+    expõe a mesma interface usada pelo TaskServer na AVL Tree
+    (insert/search/delete/inorder).
+
+    O armazenamento usa dois arquivos:
+    - "<path>.slots": cabeçalho + registros de tamanho fixo, um por tarefa,
+      gravados em ordem crescente de ID. Como os IDs são gerados em ordem
+      pelo servidor, o próprio arquivo é um "sorted run" e a busca por ID é
+      uma busca binária direto no mapeamento, sem índice em memória.
+    - "<path>.heap": área de tamanho variável (append-only) com as
+      descrições e, para cada tarefa com subtarefas, um vetor de registros
+      de tamanho fixo ordenado por ID (veja StoreSubtasks). O vetor dobra de
+      capacidade quando enche, então incluir uma subtarefa custa O(1)
+      amortizado, e concluir ou remover altera um único registro no lugar.
+    - "<path>.summary" (opcional): resumo em JSON gravado pelo servidor ao
+      desligar (contadores do SUMMARY e tarefas atrasadas), para que ele não
+      precise percorrer as tarefas ao abrir o armazenamento. O arquivo é
+      apagado antes da primeira alteração seguinte, então um resumo só é
+      encontrado se nada mudou desde que ele foi gravado.
+
+    Nada é carregado na inicialização: abrir o armazenamento apenas mapeia
+    os arquivos, então o tempo de partida independe da quantidade de tarefas.
+    Remoções marcam o registro com uma "lápide" (flag de removido).
+
+    Como as leituras não usam lock, bytes já gravados no heap nunca são
+    sobrescritos enquanto o armazenamento está aberto: regravações e remoções
+    apenas abandonam o trecho antigo, contado no cabeçalho como espaço livre.
+    Ao abrir, se esse espaço passa de metade do heap, o heap é compactado.
+    '''
+
+    MAGIC = b'TSK3'
+    HEADER = struct.Struct('<4sQQQQ4x')    # magic, slots usados, tarefas vivas, fim do heap, bytes abandonados no heap
+    # id, flags, prioridade, vencimento (ordinal), desc (off, len), vetor de subtarefas (off, registros
+    # usados, capacidade), subtarefas vivas, próximo ID de subtarefa, subtarefas concluídas
+    SLOT = struct.Struct('<qBBxxiqiqiiiii')
+    SUBTASK = struct.Struct('<qBxxxqi')    # id, flags, desc (off, len)
+    INITIAL_SLOTS = 4096
+    INITIAL_HEAP = 1 << 20
+    COMPACT_MIN_GARBAGE = 1 << 20  # Abaixo disto não vale a pena compactar ao abrir
+
+    FLAG_COMPLETED = 0x01
+    FLAG_DELETED = 0x02
+    FLAG_OVERDUE = 0x04
+
+    PRIORITIES = ['BAIXA', 'MEDIA', 'ALTA']
+
+    def __init__(self, path: str, open_stores: 'OpenStores' = None):
+        """
+        Abre (ou cria) o armazenamento localizado em "path".
+
+        Args:
+        path (str): Prefixo dos arquivos "<path>.slots" e "<path>.heap".
+        open_stores (OpenStores, optional): Limite de armazenamentos mapeados ao mesmo tempo,
+            compartilhado com outros armazenamentos. None mantém este sempre mapeado.
+        """
+        self.path = path
+        self.__open_stores = open_stores
+        self.__slots = self.__heap = None
+        self.__recover_compaction()
+        new_store = not os.path.exists(path + '.slots')
+        self.__summary_saved = os.path.exists(path + '.summary')
+        if open_stores is not None:
+            open_stores.acquire(self)
+        else:
+            self.reopen()
+        try:
+            if new_store:
+                self.__count, self.__live, self.__heap_end, self.__garbage = 0, 0, 0, 0
+                self.__write_header()
+            else:
+                magic, self.__count, self.__live, self.__heap_end, self.__garbage = self.HEADER.unpack_from(self.__slots, 0)
+                if magic != self.MAGIC:
+                    raise ValueError(f"Arquivo {path}.slots não é um armazenamento de tarefas válido.")
+                if self.__garbage > max(self.__heap_end // 2, self.COMPACT_MIN_GARBAGE):
+                    self.__compact()
+        finally:
+            if open_stores is not None:
+                open_stores.release(self)
+
+    def reopen(self):
+        '''
+        Mapeia os arquivos (criando-os, se preciso). Os arquivos são fechados logo depois:
+        cada mapeamento mantém o seu próprio descritor, então um armazenamento aberto
+        usa dois descritores.
+        '''
+        self.__slots = self.__map('.slots', self.HEADER.size + self.INITIAL_SLOTS * self.SLOT.size)
+        self.__heap = self.__map('.heap', self.INITIAL_HEAP)
+
+    def release(self):
+        '''
+        Desfaz os mapeamentos para liberar os descritores (chamado por OpenStores). Eles são
+        apenas descartados, não fechados: uma leitura que ainda os use (ex.: as subtarefas de
+        uma tarefa já lida) continua válida, e o descritor é liberado quando ela termina.
+        '''
+        self.__slots = self.__heap = None
+
+    def __pinned(method):
+        '''
+        Decorador dos métodos que usam os mapeamentos: com um OpenStores, reabre os arquivos
+        se eles foram fechados e impede que sejam fechados enquanto o método executa.
+        '''
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            open_stores = self.__open_stores
+            if open_stores is None:
+                return method(self, *args, **kwargs)
+            open_stores.acquire(self)
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                open_stores.release(self)
+        return wrapper
+
+    def __len__(self) -> int:
+        return self.__live
+
+    def isEmpty(self) -> bool:
+        return self.__live == 0
+
+    @property
+    def heap_used(self) -> int:
+        ''' Bytes já ocupados no heap, incluindo trechos abandonados por regravações. '''
+        return self.__heap_end
+
+    @property
+    def heap_garbage(self) -> int:
+        ''' Bytes do heap abandonados por regravações e remoções, recuperados na próxima compactação. '''
+        return self.__garbage
+
+    @__pinned
+    def insert(self, task: dict):
+        '''
+        Grava uma nova tarefa no final do arquivo de registros.
+
+        Os IDs precisam ser crescentes (como os gerados pelo TaskServer). Um ID
+        que pertença a um registro removido é reaproveitado no mesmo lugar.
+        '''
+        self.__discard_summary()
+        key = task['id']
+        index = self.__find(key)
+        if index is not None:
+            if not self.__slot_flags(index) & self.FLAG_DELETED:
+                raise ValueError(f"Tarefa {key} já existe no armazenamento.")
+            self.__write_slot(index, task)
+            self.__live += 1
+            self.__write_header()
+            return
+
+        if self.__count and key < self.__slot_id(self.__count - 1):
+            raise ValueError(f"ID {key} fora de ordem: o armazenamento exige IDs crescentes.")
+
+        if self.HEADER.size + (self.__count + 1) * self.SLOT.size > len(self.__slots):
+            self.__slots = self.__remap(self.__slots, '.slots', 2 * len(self.__slots))
+
+        self.__write_slot(self.__count, task)
+        self.__count += 1
+        self.__live += 1
+        self.__write_header()
+
+    @__pinned
+    def search(self, key: any) -> any:
+        '''
+        Busca binária pelo ID no mapeamento. Retorna um dicionário da tarefa
+        ou None se ela não existir (ou tiver sido removida).
+        '''
+        index = self.__find(key)
+        if index is None or self.__slot_flags(index) & self.FLAG_DELETED:
+            return None
+        return self.__read_slot(index)
+
+    @__pinned
+    def update(self, task: dict):
+        '''
+        Regrava uma tarefa já existente após alterações feitas pelo servidor no
+        dicionário devolvido por "search".
+        '''
+        index = self.__find(task['id'])
+        if index is None or self.__slot_flags(index) & self.FLAG_DELETED:
+            raise KeyError(task['id'])
+        self.__discard_summary()
+        self.__write_slot(index, task)
+        self.__write_header()  # A regravação pode ter acrescentado bytes ao heap
+
+    @__pinned
+    def delete(self, key: any):
+        '''
+        Marca o registro da tarefa como removido (lápide).
+        '''
+        index = self.__find(key)
+        if index is None:
+            return
+        flags = self.__slot_flags(index)
+        if flags & self.FLAG_DELETED:
+            return
+        self.__discard_summary()
+        struct.pack_into('<B', self.__slots, self.__slot_offset(index) + 8, flags | self.FLAG_DELETED)
+        self.__garbage += self.__extent_bytes(index)
+        self.__live -= 1
+        self.__write_header()
+
+    @__pinned
+    def inorder(self, visit_callback):
+        """ Percorre os registros em ordem de ID, executando o callback para cada tarefa viva. """
+        for index in range(self.__count):
+            if not self.__slot_flags(index) & self.FLAG_DELETED:
+                visit_callback(StoreNode(self.__read_slot(index)))
+
+    @__pinned
+    def getMax(self) -> any:
+        '''
+        Retorna a tarefa de maior ID ainda presente, ou None se vazio.
+        '''
+        for index in range(self.__count - 1, -1, -1):
+            if not self.__slot_flags(index) & self.FLAG_DELETED:
+                return self.__read_slot(index)
+        return None
+
+    @__pinned
+    def due_before(self, ordinal: int) -> list:
+        '''
+        Retorna (vencimento, ID) das tarefas vivas, não concluídas e ainda não
+        marcadas como atrasadas cujo vencimento é anterior a "ordinal". Lê apenas
+        os registros de tamanho fixo, sem decodificar descrições e subtarefas.
+        '''
+        slots = self.__slots  # Referência local: um remapeamento não invalida a leitura
+        end = self.HEADER.size + self.__count * self.SLOT.size
+        skip = self.FLAG_COMPLETED | self.FLAG_DELETED | self.FLAG_OVERDUE
+        with memoryview(slots) as view:
+            return [(due, task_id) for task_id, flags, _, due, *_ in self.SLOT.iter_unpack(view[self.HEADER.size:end])
+                    if not flags & skip and 0 < due < ordinal]
+
+    def load_summary(self) -> dict:
+        '''
+        Retorna o resumo gravado por "save_summary", ou None se ele não existe
+        ou não corresponde ao estado atual dos arquivos.
+        '''
+        if not self.__summary_saved:
+            return None
+        try:
+            with open(self.path + '.summary', encoding='utf-8') as summary_file:
+                stored = json.load(summary_file)
+        except (OSError, ValueError):
+            return None
+        if stored.get('store') != [self.__count, self.__live, self.__heap_end]:
+            return None
+        return stored['summary']
+
+    def save_summary(self, summary: dict):
+        '''
+        Grava o resumo (serializável em JSON) junto com o tamanho atual dos
+        arquivos. A gravação é atômica (arquivo temporário + rename).
+        '''
+        temporary = self.path + '.summary.tmp'
+        with open(temporary, 'w', encoding='utf-8') as summary_file:
+            json.dump({'store': [self.__count, self.__live, self.__heap_end], 'summary': summary}, summary_file)
+            summary_file.flush()
+            os.fsync(summary_file.fileno())
+        os.replace(temporary, self.path + '.summary')
+        self.__summary_saved = True
+
+    @__pinned
+    def flush(self):
+        '''
+        Força a gravação das páginas alteradas em disco.
+        '''
+        self.__slots.flush()
+        self.__heap.flush()
+
+    def close(self):
+        self.flush()
+        if self.__open_stores is not None:
+            self.__open_stores.forget(self)
+        if self.__slots is not None:  # Pode ter sido desmapeado pelo OpenStores depois do flush
+            self.__slots.close()
+            self.__heap.close()
+            self.__slots = self.__heap = None
+
+    def __find(self, key: int) -> int:
+        low, high = 0, self.__count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            middle_key = self.__slot_id(middle)
+            if middle_key == key:
+                return middle
+            if middle_key < key:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None
+
+    def __slot_offset(self, index: int) -> int:
+        return self.HEADER.size + index * self.SLOT.size
+
+    def __slot_id(self, index: int) -> int:
+        return struct.unpack_from('<q', self.__slots, self.__slot_offset(index))[0]
+
+    def __slot_flags(self, index: int) -> int:
+        return self.__slots[self.__slot_offset(index) + 8]
+
+    def __read_slot(self, index: int) -> dict:
+        heap = self.__heap  # Referência local: um remapeamento não invalida a leitura das subtarefas
+        task_id, flags, priority, due, desc_off, desc_len, sub_off, sub_count, _, sub_live, next_subtask_id, done = \
+            self.SLOT.unpack_from(self.__slots, self.__slot_offset(index))
+        return {
+            'id': task_id,
+            'description': heap[desc_off:desc_off + desc_len].decode(),
+            'completed': bool(flags & self.FLAG_COMPLETED),
+            'due_date': due or None,
+            'overdue': bool(flags & self.FLAG_OVERDUE),
+            'priority': self.PRIORITIES[priority],
+            'subtasks': StoreSubtasks(heap, sub_off, sub_count, sub_live),
+            'next_subtask_id': next_subtask_id,
+            'subtasks_done': done,
+        }
+
+    def __write_slot(self, index: int, task: dict):
+        offset = self.__slot_offset(index)
+        if index < self.__count and not self.__slot_flags(index) & self.FLAG_DELETED:  # Lápides já foram descontadas
+            old_desc_off, old_desc_len, sub_off, sub_count, sub_cap, sub_live = \
+                struct.unpack_from('<qiqiii', self.__slots, offset + 16)
+        else:
+            old_desc_off, old_desc_len, sub_off, sub_count, sub_cap, sub_live = 0, 0, 0, 0, 0, 0
+
+        description = task['description'].encode()
+        desc_off, desc_len = self.__store_bytes(description, old_desc_off, old_desc_len)
+        subtasks = task['subtasks']
+        if isinstance(subtasks, StoreSubtasks):
+            sub_off, sub_count, sub_cap, sub_live = self.__write_subtask_changes(subtasks, sub_off, sub_count, sub_cap, sub_live)
+        else:  # Dicionário comum (tarefa nova ou ID reaproveitado): grava todas as subtarefas em um vetor novo
+            sub_off, sub_count, sub_cap, sub_live = 0, 0, 0, 0
+            for subtask in subtasks.values():
+                sub_off, sub_count, sub_cap = self.__append_subtask(subtask, sub_off, sub_count, sub_cap)
+                sub_live += 1
+
+        flags = (self.FLAG_COMPLETED if task['completed'] else 0) | (self.FLAG_OVERDUE if task['overdue'] else 0)
+        due = task['due_date'] or 0
+        self.SLOT.pack_into(self.__slots, offset, task['id'], flags, self.PRIORITIES.index(task['priority']),
+                            due, desc_off, desc_len, sub_off, sub_count, sub_cap, sub_live,
+                            task['next_subtask_id'], task['subtasks_done'])
+
+    def __write_subtask_changes(self, subtasks: StoreSubtasks, sub_off: int, sub_count: int, sub_cap: int,
+                                sub_live: int) -> tuple:
+        '''
+        Grava apenas as alterações pendentes em "subtasks": marca os registros removidos,
+        regrava a flag das subtarefas lidas que mudaram e acrescenta as novas. Depois
+        aponta "subtasks" para o vetor atualizado.
+        '''
+        for index in subtasks.removed.values():
+            self.__set_subtask_flags(sub_off, index, self.FLAG_DELETED, True)
+            self.__garbage += self.SUBTASK.size + self.SUBTASK.unpack_from(self.__heap, sub_off + index * self.SUBTASK.size)[3]
+            sub_live -= 1
+        for index, subtask in subtasks.loaded.values():
+            self.__set_subtask_flags(sub_off, index, self.FLAG_COMPLETED, subtask['completed'])
+        for subtask_id in sorted(subtasks.added):  # IDs crescentes mantêm o vetor ordenado
+            sub_off, sub_count, sub_cap = self.__append_subtask(subtasks.added[subtask_id], sub_off, sub_count, sub_cap)
+            sub_live += 1
+        subtasks.reset(self.__heap, sub_off, sub_count, sub_live)
+        return sub_off, sub_count, sub_cap, sub_live
+
+    def __set_subtask_flags(self, sub_off: int, index: int, flag: int, value: bool):
+        position = sub_off + index * self.SUBTASK.size + 8
+        flags = self.__heap[position]
+        new_flags = flags | flag if value else flags & ~flag
+        if new_flags != flags:
+            self.__heap[position] = new_flags
+
+    def __append_subtask(self, subtask: dict, sub_off: int, sub_count: int, sub_cap: int) -> tuple:
+        '''
+        Acrescenta um registro ao vetor de subtarefas de uma tarefa. Quando o vetor está cheio,
+        ele é copiado para um trecho novo com o dobro da capacidade (custo O(1) amortizado).
+
+        Returns:
+        tuple: (posição do vetor, registros usados, capacidade) depois da inclusão.
+        '''
+        if sub_count == sub_cap:
+            new_cap = max(4, 2 * sub_cap)
+            new_off = self.__reserve(new_cap * self.SUBTASK.size)
+            size = sub_count * self.SUBTASK.size
+            self.__heap[new_off:new_off + size] = self.__heap[sub_off:sub_off + size]
+            self.__garbage += sub_cap * self.SUBTASK.size
+            sub_off, sub_cap = new_off, new_cap
+        desc_off, desc_len = self.__store_bytes(subtask['description'].encode(), 0, 0)
+        flags = self.FLAG_COMPLETED if subtask['completed'] else 0
+        self.SUBTASK.pack_into(self.__heap, sub_off + sub_count * self.SUBTASK.size, subtask['id'], flags, desc_off, desc_len)
+        return sub_off, sub_count + 1, sub_cap
+
+    def __store_bytes(self, data: bytes, old_off: int, old_len: int) -> tuple:
+        """
+        Reaproveita o trecho já gravado no heap quando o conteúdo não mudou;
+        caso contrário, acrescenta os bytes ao final do heap.
+        """
+        if len(data) == old_len and self.__heap[old_off:old_off + old_len] == data:
+            return old_off, old_len
+        self.__garbage += old_len
+        offset = self.__reserve(len(data))
+        self.__heap[offset:offset + len(data)] = data
+        return offset, len(data)
+
+    def __reserve(self, size: int) -> int:
+        ''' Reserva "size" bytes no final do heap, aumentando o arquivo se preciso. Retorna a posição. '''
+        if self.__heap_end + size > len(self.__heap):
+            self.__heap = self.__remap(self.__heap, '.heap', max(2 * len(self.__heap), self.__heap_end + size))
+        offset = self.__heap_end
+        self.__heap_end += size
+        return offset
+
+    def __extent_bytes(self, index: int) -> int:
+        ''' Bytes do heap usados por uma tarefa: descrição, vetor de subtarefas e descrições das subtarefas vivas. '''
+        _, desc_len, sub_off, sub_count, sub_cap, _ = struct.unpack_from('<qiqiii', self.__slots, self.__slot_offset(index) + 16)
+        records = self.__heap[sub_off:sub_off + sub_count * self.SUBTASK.size]
+        return desc_len + sub_cap * self.SUBTASK.size + sum(
+            length for _, flags, _, length in self.SUBTASK.iter_unpack(records) if not flags & self.FLAG_DELETED)
+
+    def __compact(self):
+        '''
+        Reescreve o heap só com os trechos em uso, descartando o espaço abandonado e os
+        registros de subtarefas removidas. Roda ao abrir o armazenamento, antes de qualquer
+        leitura, então nenhum mapeamento antigo está em uso.
+
+        Os arquivos novos são gravados ao lado dos atuais ("<path>.slots.compact" e
+        "<path>.heap.compact") e trocados por rename; a troca dos registros é o ponto de
+        confirmação (veja "__recover_compaction").
+        '''
+        summary = self.load_summary()
+        slots_path, heap_path = self.path + '.slots.compact', self.path + '.heap.compact'
+        shutil.copyfile(self.path + '.slots', slots_path)  # Criado antes do heap novo
+        heap = self.__heap
+        end = 0
+        with open(slots_path, 'r+b') as slots_file, open(heap_path, 'w+b') as heap_file:
+            def write(data: bytes) -> int:
+                nonlocal end
+                heap_file.write(data)
+                end += len(data)
+                return end - len(data)
+
+            with mmap.mmap(slots_file.fileno(), 0) as slots:
+                for index in range(self.__count):
+                    offset = self.__slot_offset(index)
+                    fields = list(self.SLOT.unpack_from(slots, offset))
+                    if fields[1] & self.FLAG_DELETED:
+                        fields[4:10] = [0] * 6
+                    else:
+                        desc_off, desc_len, sub_off, sub_count = fields[4:8]
+                        fields[4] = write(heap[desc_off:desc_off + desc_len])
+                        records = [self.SUBTASK.pack(subtask_id, flags, write(heap[off:off + length]), length)
+                                   for subtask_id, flags, off, length in self.SUBTASK.iter_unpack(heap[sub_off:sub_off + sub_count * self.SUBTASK.size])
+                                   if not flags & self.FLAG_DELETED]
+                        fields[6] = write(b''.join(records)) if records else 0
+                        fields[7:10] = [len(records)] * 3
+                    self.SLOT.pack_into(slots, offset, *fields)
+                self.HEADER.pack_into(slots, 0, self.MAGIC, self.__count, self.__live, end, 0)
+                slots.flush()
+            heap_file.truncate(max(end, self.INITIAL_HEAP))
+            heap_file.flush()
+            os.fsync(heap_file.fileno())
+            os.fsync(slots_file.fileno())
+
+        os.replace(slots_path, self.path + '.slots')  # Ponto de confirmação
+        os.replace(heap_path, self.path + '.heap')
+        self.reopen()  # Os mapeamentos antigos apontam para os arquivos substituídos
+        self.__heap_end, self.__garbage = end, 0
+        if summary is not None:
+            self.save_summary(summary)  # O conteúdo não mudou; só o tamanho do heap
+
+    def __recover_compaction(self):
+        ''' Conclui ou descarta uma compactação interrompida por uma queda (veja "__compact"). '''
+        slots_path, heap_path = self.path + '.slots.compact', self.path + '.heap.compact'
+        if os.path.exists(slots_path):  # Interrompida antes da troca: os arquivos atuais continuam valendo
+            os.unlink(slots_path)
+            if os.path.exists(heap_path):
+                os.unlink(heap_path)
+        elif os.path.exists(heap_path):  # Registros já trocados: falta só o heap
+            os.replace(heap_path, self.path + '.heap')
+
+    def __discard_summary(self):
+        '''
+        Apaga o resumo gravado antes da primeira alteração seguinte: se o
+        processo terminar sem gravar um novo, o servidor refaz os contadores.
+        '''
+        if self.__summary_saved:
+            self.__summary_saved = False
+            try:
+                os.unlink(self.path + '.summary')
+            except FileNotFoundError:
+                pass
+
+    def __write_header(self):
+        self.HEADER.pack_into(self.__slots, 0, self.MAGIC, self.__count, self.__live, self.__heap_end, self.__garbage)
+
+    def __map(self, suffix: str, initial_size: int) -> mmap.mmap:
+        with open(self.path + suffix, 'a+b') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                self.__grow_file(file, initial_size)
+            return mmap.mmap(file.fileno(), 0)
+
+    def __remap(self, mapping: mmap.mmap, suffix: str, size: int) -> mmap.mmap:
+        '''
+        Aumenta o arquivo e o mapeia de novo. O mapeamento antigo não é fechado
+        aqui: as leituras não usam o lock do servidor e uma delas pode estar
+        usando-o neste momento. Ele continua válido (os dois mapeamentos
+        compartilham as páginas do arquivo) e é desfeito quando a última
+        referência a ele deixa de existir.
+        '''
+        mapping.flush()
+        with open(self.path + suffix, 'r+b') as file:
+            self.__grow_file(file, size)
+            return mmap.mmap(file.fileno(), 0)
+
+    @staticmethod
+    def __grow_file(file, size: int):
+        file.truncate(size)
+        file.flush()
+
+
+class OpenStores:
+    '''
+    Limite de MMapTaskStore mapeados ao mesmo tempo, compartilhado pelos
+    armazenamentos das listas de um servidor. Cada armazenamento mapeado
+    usa dois descritores de arquivo; com milhares de listas, os usados há
+    mais tempo (LRU) são desmapeados e reabertos no próximo acesso. Um
+    armazenamento com um método em execução nunca é desmapeado, então o
+    limite pode ser excedido enquanto todos estiverem em uso.
+    '''
+
+    def __init__(self, limit: int = 256):
+        """
+        Args:
+        limit (int): Quantidade máxima de armazenamentos mapeados. Padrão é 256 (512 descritores).
+        """
+        self.limit = limit
+        self.__lock = threading.Lock()
+        self.__open = OrderedDict()  # Armazenamento mapeado -> métodos em execução nele, do menos ao mais recente
+
+    def __len__(self) -> int:
+        return len(self.__open)
+
+    def acquire(self, store: MMapTaskStore):
+        ''' Marca o armazenamento como em uso e recente, mapeando-o de novo se preciso. '''
+        with self.__lock:
+            users = self.__open.pop(store, None)
+            if users is None:
+                self.__evict(self.limit - 1)  # Libera descritores antes de abrir os arquivos
+                store.reopen()
+                users = 0
+            self.__open[store] = users + 1
+
+    def release(self, store: MMapTaskStore):
+        with self.__lock:
+            if store in self.__open:
+                self.__open[store] -= 1
+                self.__evict(self.limit)
+
+    def forget(self, store: MMapTaskStore):
+        ''' Deixa de controlar um armazenamento que foi fechado. '''
+        with self.__lock:
+            self.__open.pop(store, None)
+
+    def __evict(self, limit: int):
+        idle = [store for store, users in self.__open.items() if not users]
+        for store in idle[:max(0, len(self.__open) - limit)]:
+            del self.__open[store]
+            store.release()
+
+
+if __name__ == '__main__':
+    # Benchmark: compara o MMapTaskStore com a AVLTree em memória.
+    # Uso: python -m ds.mmap_store [quantidade de tarefas] (padrão: 10 milhões)
+    import sys
+    import tempfile
+    import time
+    from ds.avl_tree import AVLTree
+
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    lookups = min(total, 100_000)
+
+    def make_task(task_id: int) -> dict:
+        return {'id': task_id, 'description': f'Tarefa {task_id}', 'completed': False,
+                'due_date': date(2024, 10, 10).toordinal(), 'overdue': False, 'priority': 'BAIXA', 'subtasks': {}, 'next_subtask_id': 1, 'subtasks_done': 0}
+
+    def bench(name: str, store):
+        start = time.perf_counter()
+        for task_id in range(1, total + 1):
+            store.insert(make_task(task_id))
+        insert_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for task_id in range(1, total + 1, max(1, total // lookups)):
+            store.search(task_id)
+        search_time = time.perf_counter() - start
+        print(f"{name}: insert {total / insert_time:,.0f} ops/s, search {lookups / search_time:,.0f} ops/s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'tasks')
+        store = MMapTaskStore(path)
+        bench('MMapTaskStore', store)
+        store.close()
+
+        start = time.perf_counter()
+        reopened = MMapTaskStore(path)
+        print(f"MMapTaskStore: reabertura com {len(reopened):,} tarefas em {(time.perf_counter() - start) * 1000:.2f} ms")
+        reopened.close()
+
+    bench('AVLTree', AVLTree())
@@ -0,0 +1,93 @@
+import json
+import os
+from collections import OrderedDict
+
+
+class IdempotencyCache:
+    """
+    Respostas já enviadas por chave de idempotência (comando KEY), em um LRU limitado a "size"
+    chaves. Não é thread-safe: o servidor o protege com o seu "idempotency_lock".
+
+    Com "path", cada resposta também é acrescentada a um arquivo (uma linha JSON por chave),
+    gravado ao lado do armazenamento, e as últimas "size" chaves são recarregadas na próxima
+    partida: um KEY reenviado depois de reiniciar o servidor recebe a resposta original em vez
+    de ser executado de novo. O arquivo tem a mesma durabilidade do armazenamento em mmap
+    (sobrevive à queda do processo, sem fsync a cada chave) e é regravado só com as chaves
+    retidas quando passa do dobro do limite.
+    """
+
+    def __init__(self, size: int = 10000, path: str = None) -> None:
+        """
+        Args:
+        size (int): Quantidade máxima de chaves guardadas. Padrão é 10000.
+        path (str, optional): Arquivo onde as chaves são persistidas. None mantém as chaves só em memória.
+        """
+        self.size = size
+        self.path = path
+        self.entries = OrderedDict()  # Chave -> resposta, da usada há mais tempo à mais recente
+        self.logged = 0  # Linhas no arquivo, incluindo as de chaves já descartadas
+        self.file = None
+        if path:
+            self.__load()
+            self.__compact()
+
+    def get(self, key: str) -> str:
+        """Retorna a resposta guardada para a chave (marcando-a como usada), ou None."""
+        response = self.entries.get(key)
+        if response is not None:
+            self.entries.move_to_end(key)
+        return response
+
+    def put(self, key: str, response: str) -> None:
+        """Guarda a resposta de uma chave, descartando a mais antiga se o limite foi atingido."""
+        self.entries[key] = response
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        if self.file:
+            self.file.write(json.dumps({'key': key, 'response': response}) + '\n')
+            self.file.flush()
+            self.logged += 1
+            if self.logged > 2 * self.size:
+                self.__compact()
+
+    def close(self) -> None:
+        """Fecha o arquivo das chaves (se houver)."""
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __load(self) -> None:
+        """Recarrega as chaves do arquivo; uma última linha incompleta (gravação interrompida) é ignorada."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as keys_file:
+            for line in keys_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                self.entries[entry['key']] = entry['response']
+                self.entries.move_to_end(entry['key'])
+                if len(self.entries) > self.size:
+                    self.entries.popitem(last=False)
+
+    def __compact(self) -> None:
+        """Regrava o arquivo apenas com as chaves retidas (arquivo temporário + rename)."""
+        if self.file:
+            self.file.close()
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as keys_file:
+            for key, response in self.entries.items():
+                keys_file.write(json.dumps({'key': key, 'response': response}) + '\n')
+            keys_file.flush()
+            os.fsync(keys_file.fileno())
+        os.replace(temporary, self.path)
+        self.logged = len(self.entries)
+        self.file = open(self.path, 'a', encoding='utf-8')
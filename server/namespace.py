@@ -0,0 +1,159 @@
+import re
+import threading
+import uuid
+from collections import Counter, OrderedDict
+
+
+class FragmentCache:
+    """
+    Fragmentos de listagem já codificados em bytes, compartilhados por todas as listas do servidor
+    e limitados a "max_bytes": quando o limite é ultrapassado, os fragmentos das tarefas usadas há
+    mais tempo são descartados (LRU). Assim o cache não cresce com a quantidade de tarefas e não
+    traz para a memória uma cópia de um armazenamento em disco.
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20) -> None:
+        """
+        Args:
+        max_bytes (int): Tamanho máximo dos fragmentos guardados. 0 desativa o cache. Padrão é 64 MiB.
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # (lista, ID da tarefa) -> {tipo de listagem: fragmento}, do menos ao mais recente
+        self.size = 0  # Soma do tamanho dos fragmentos guardados
+        self.lock = threading.Lock()
+
+    def get(self, namespace, task_id: int, kind: str) -> bytes:
+        """
+        Retorna o fragmento guardado (marcando-o como usado), ou None. Lê sem o lock, como as
+        listagens: cada operação do OrderedDict é atômica e um fragmento descartado ao mesmo tempo
+        apenas deixa de ser marcado.
+        """
+        key = (namespace.name, task_id)
+        fragments = self.entries.get(key)
+        fragment = fragments.get(kind) if fragments is not None else None
+        if fragment is not None:
+            try:
+                self.entries.move_to_end(key)
+            except KeyError:
+                pass
+        return fragment
+
+    def put(self, namespace, task_id: int, kind: str, fragment: bytes, generation: int) -> None:
+        """
+        Guarda um fragmento renderizado, desde que nenhuma tarefa da lista tenha sido alterada
+        desde "generation" (lida antes da renderização), e descarta os mais antigos se necessário.
+        """
+        if len(fragment) > self.max_bytes:
+            return
+        with self.lock:
+            if generation != namespace.render_generation:
+                return
+            fragments = self.entries.setdefault((namespace.name, task_id), {})
+            self.entries.move_to_end((namespace.name, task_id))
+            self.size += len(fragment) - len(fragments.get(kind, b''))
+            fragments[kind] = fragment
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= sum(len(value) for value in evicted.values())
+
+    def discard(self, namespace, task_id: int) -> None:
+        """Descarta os fragmentos de uma tarefa e invalida as renderizações em andamento na lista."""
+        with self.lock:
+            namespace.render_generation += 1
+            fragments = self.entries.pop((namespace.name, task_id), None)
+            if fragments:
+                self.size -= sum(len(value) for value in fragments.values())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class Namespace:
+    """
+    Lista de tarefas com nome (namespace): cada uma tem seu próprio armazenamento,
+    contador de IDs, lock, versões, fragmentos renderizados e contadores do resumo.
+    Alterações em listas diferentes não disputam o mesmo lock e as listagens de uma
+    lista só percorrem os dados dela.
+
+    Usa __slots__ e cria apenas o necessário, para que o servidor mantenha milhares
+    de listas sem custo relevante.
+    """
+    __slots__ = ('name', 'task_tree', 'next_id', 'lock', 'rendered', 'render_generation',
+                 'epoch', 'version', 'task_versions', 'status_counts', 'open_due_counts', 'deadline_counts',
+                 'overdue_ids')
+
+    NAME_PATTERN = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+    def __init__(self, name: str, task_tree, rendered: FragmentCache = None) -> None:
+        """
+        Args:
+        name (str): Nome da lista.
+        task_tree: Armazenamento das tarefas da lista (AVLTree, MMapTaskStore, ...).
+        rendered (FragmentCache, optional): Cache de fragmentos compartilhado com as demais listas.
+            Padrão é um cache próprio com o limite padrão.
+        """
+        self.name = name
+        self.task_tree = task_tree
+        last_task = task_tree.getMax()
+        self.next_id = last_task['id'] + 1 if last_task else 1  # Para gerar IDs únicos dentro da lista
+        self.lock = threading.Lock()  # Protege os dados da lista
+        self.rendered = rendered if rendered is not None else FragmentCache()  # Linhas já codificadas em bytes
+        self.render_generation = 0  # Incrementado a cada invalidação, evita guardar linhas desatualizadas
+        self.epoch = uuid.uuid4().hex[:8]  # Distingue as versões desta lista (e execução) das demais
+        self.version = 0  # Versão da lista, incrementada a cada alteração
+        self.task_versions = {}  # ID da tarefa -> versão da lista na sua última alteração (ausente = 0)
+        self.status_counts = Counter()  # (prioridade, concluída) -> quantidade de tarefas
+        self.open_due_counts = Counter()  # Data de vencimento (ordinal, ou None) -> quantidade de tarefas não concluídas
+        self.deadline_counts = Counter()  # Data de vencimento -> tarefas não concluídas que ainda não estão atrasadas
+        self.overdue_ids = {}  # IDs das tarefas abertas e atrasadas (dicionário usado como conjunto ordenado)
+
+    @classmethod
+    def is_valid_name(cls, name: str) -> bool:
+        """Nomes de lista usam letras, dígitos, "_" e "-" (até 64 caracteres)."""
+        return cls.NAME_PATTERN.fullmatch(name) is not None
+
+    def count_task(self, task: dict, delta: int) -> None:
+        """
+        Soma "delta" aos contadores do resumo na posição correspondente ao estado atual da tarefa
+        (chamado dentro de "lock"). As alterações chamam com -1 antes de modificar a tarefa
+        e com +1 depois, mantendo o resumo atualizado sem percorrer a árvore.
+        """
+        self.status_counts[(task['priority'], task['completed'])] += delta
+        if not task['completed']:
+            self.open_due_counts[task['due_date']] += delta
+            if not self.open_due_counts[task['due_date']]:
+                del self.open_due_counts[task['due_date']]
+            if task['due_date'] is not None and not task['overdue']:
+                self.deadline_counts[task['due_date']] += delta
+                if not self.deadline_counts[task['due_date']]:
+                    del self.deadline_counts[task['due_date']]
+
+    def snapshot(self) -> dict:
+        """Contadores e tarefas atrasadas em formato JSON, gravados com o armazenamento ao desligar."""
+        return {
+            'status_counts': [[priority, completed, count] for (priority, completed), count in self.status_counts.items()],
+            'open_due_counts': [[due_date, count] for due_date, count in self.open_due_counts.items()],
+            'deadline_counts': [[due_date, count] for due_date, count in self.deadline_counts.items()],
+            'overdue_ids': list(self.overdue_ids),
+        }
+
+    def restore(self, state: dict) -> None:
+        """Recarrega os contadores gravados por "snapshot", sem percorrer as tarefas."""
+        self.status_counts = Counter({(priority, completed): count for priority, completed, count in state['status_counts']})
+        self.open_due_counts = Counter({due_date: count for due_date, count in state['open_due_counts']})
+        self.deadline_counts = Counter({due_date: count for due_date, count in state['deadline_counts']})
+        self.overdue_ids = dict.fromkeys(state['overdue_ids'])
+
+    def mark_changed(self, task_id: int) -> None:
+        """
+        Registra a alteração de uma tarefa (chamado dentro de "lock"): incrementa a versão da
+        lista e a da tarefa e descarta seus fragmentos já renderizados. Tarefas removidas mantêm
+        sua versão, para que uma busca condicional por elas detecte a remoção.
+        """
+        self.version += 1
+        self.task_versions[task_id] = self.version
+        self.invalidate_rendered(task_id)
+
+    def invalidate_rendered(self, task_id: int) -> None:
+        """Descarta os fragmentos guardados de uma tarefa alterada ou removida."""
+        self.rendered.discard(self, task_id)
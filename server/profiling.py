@@ -0,0 +1,248 @@
+import cProfile
+import json
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+
+class CommandTrace:
+    """
+    Tempos, por fase, de um comando acompanhado pelo SlowCommandLog.
+
+    As fases sequenciais (parse, execute, send) são fechadas com "mark"; a
+    fase "render" acontece dentro de "execute" e é acumulada com "add".
+    """
+    __slots__ = ('command', 'started', 'last', 'phases', 'overhead')
+
+    def __init__(self, command: str) -> None:
+        self.command = command
+        self.started = self.last = time.perf_counter()
+        self.phases = {}
+        self.overhead = Counter()  # Gancho -> segundos gastos pelo próprio registro
+
+    def mark(self, phase: str) -> None:
+        """Encerra a fase sequencial atual, atribuindo a ela o tempo desde a marca anterior."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+        self.overhead[phase] += time.perf_counter() - now
+
+    def add(self, phase: str, started: float) -> None:
+        """Acumula em uma fase aninhada o tempo desde "started" (obtido com time.perf_counter)."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - started
+        self.overhead[phase] += time.perf_counter() - now
+
+
+class SlowCommandLog:
+    """
+    Registro dos comandos que passaram de um limite de duração, com o tempo de
+    cada fase: "parse" (decodificação e admissão), "execute" (lógica do comando
+    e percurso da árvore), "render" (formatação das linhas das listagens) e
+    "send" (envio da resposta).
+
+    O registro só existe quando um limite é configurado; desativado, o servidor
+    faz apenas uma verificação de None por comando.
+
+    Cada gancho tem um orçamento de sobrecarga: a fração do tempo de relógio
+    que ele pode consumir. Quando algum gancho passa do orçamento, apenas um a
+    cada "sample_every" comandos é acompanhado (o intervalo dobra a cada janela
+    acima do orçamento e volta a cair quando a sobrecarga diminui).
+    """
+
+    WINDOW = 10.0  # Segundos entre reavaliações da sobrecarga
+    MAX_SAMPLE_EVERY = 1024
+
+    def __init__(self, threshold: float, path: str = None, max_entries: int = 100, overhead_budget: float = 0.005) -> None:
+        """
+        Args:
+        threshold (float): Duração mínima, em segundos, para um comando ser registrado.
+        path (str, optional): Arquivo onde cada comando lento é acrescentado como uma linha JSON.
+        max_entries (int): Quantidade de comandos lentos mantidos em memória.
+        overhead_budget (float): Fração do tempo de relógio que cada gancho pode consumir.
+        """
+        self.threshold = threshold
+        self.path = path
+        self.entries = deque(maxlen=max_entries)
+        self.overhead_budget = overhead_budget
+        self.sample_every = 1
+        self.seen = 0
+        self.overhead = Counter()  # Gancho -> segundos gastos na janela atual
+        self.total_overhead = Counter()
+        self.window_started = time.monotonic()
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def begin(self, command: str) -> CommandTrace:
+        """
+        Começa a acompanhar um comando na thread atual.
+
+        Returns:
+        CommandTrace: O acompanhamento, ou None se o comando ficou fora da amostragem.
+        """
+        self.seen += 1  # Contagem aproximada entre threads; basta para a amostragem
+        if self.seen % self.sample_every:
+            return None
+        trace = CommandTrace(command)
+        self.local.trace = trace
+        return trace
+
+    def current(self) -> CommandTrace:
+        """Retorna o acompanhamento ativo na thread atual (ou None)."""
+        return getattr(self.local, 'trace', None)
+
+    def finish(self, trace: CommandTrace) -> None:
+        """Encerra o acompanhamento (fechando a fase "send") e registra o comando se ele foi lento."""
+        trace.mark('send')
+        self.local.trace = None
+        started = time.perf_counter()
+        total = trace.last - trace.started
+        entry = None
+        if total >= self.threshold:
+            phases = dict(trace.phases)
+            if 'render' in phases and 'execute' in phases:
+                phases['execute'] = max(0.0, phases['execute'] - phases['render'])
+            entry = {
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'command': trace.command[:80],
+                'total_ms': round(total * 1000, 3),
+                'phases_ms': {phase: round(seconds * 1000, 3) for phase, seconds in phases.items()},
+            }
+
+        with self.lock:
+            if entry:
+                self.entries.append(entry)
+                if self.path:
+                    with open(self.path, 'a', encoding='utf-8') as log_file:
+                        log_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.overhead.update(trace.overhead)
+            self.overhead['finish'] += time.perf_counter() - started
+            self.__check_budget()
+
+    def __check_budget(self) -> None:
+        """Ajusta a amostragem ao fim de cada janela, conforme o gancho mais custoso."""
+        now = time.monotonic()
+        elapsed = now - self.window_started
+        if elapsed < self.WINDOW:
+            return
+        worst = max(self.overhead.values(), default=0.0) / elapsed
+        if worst > self.overhead_budget:
+            self.sample_every = min(self.MAX_SAMPLE_EVERY, self.sample_every * 2)
+        elif worst < self.overhead_budget / 4 and self.sample_every > 1:
+            self.sample_every //= 2
+        self.total_overhead.update(self.overhead)
+        self.overhead.clear()
+        self.window_started = now
+
+    def report(self) -> str:
+        """Descreve os comandos lentos mais recentes e a sobrecarga de cada gancho."""
+        with self.lock:
+            entries = list(self.entries)
+            overhead = self.total_overhead + self.overhead
+            sample_every = self.sample_every
+
+        header = f"Comandos lentos (limite: {self.threshold * 1000:.2f} ms, amostragem: 1/{sample_every}):"
+        if not entries:
+            lines = ["Nenhum comando lento registrado."]
+        else:
+            lines = [f"{entry['time']} {entry['command']}: {entry['total_ms']:.2f} ms ("
+                     + ", ".join(f"{phase}: {ms:.2f} ms" for phase, ms in entry['phases_ms'].items()) + ")"
+                     for entry in entries]
+        hooks = ", ".join(f"{hook}: {seconds * 1000:.2f} ms" for hook, seconds in sorted(overhead.items()))
+        return "\n".join([header] + lines + [f"Sobrecarga dos ganchos: {hooks or 'nenhuma'}"])
+
+
+class Profiler:
+    """
+    Coleta de perfil sob demanda, ativa por um tempo limitado.
+
+    - "cprofile": os comandos executados pelo servidor rodam sob um único
+      cProfile.Profile. Só um comando é perfilado por vez; os que executam ao
+      mesmo tempo em outras threads seguem sem perfil. O resultado é gravado no
+      formato do pstats.
+    - "sample": uma thread amostra, a cada "interval" segundos, a pilha das
+      threads que estão executando comandos e grava as pilhas agregadas no
+      formato "collapsed" (uma pilha por linha, seguida da contagem), aceito
+      pelas ferramentas de flame graph.
+    """
+
+    MODES = ("cprofile", "sample")
+
+    def __init__(self, mode: str, duration: float, path: str, on_finish=None, interval: float = 0.005) -> None:
+        """
+        Args:
+        mode (str): "cprofile" ou "sample".
+        duration (float): Segundos de coleta.
+        path (str): Arquivo onde o resultado é gravado ao final.
+        on_finish (callable, optional): Chamado sem argumentos depois que o resultado é gravado.
+        interval (float): Intervalo entre amostras no modo "sample".
+        """
+        self.mode = mode
+        self.duration = duration
+        self.path = path
+        self.on_finish = on_finish
+        self.interval = interval
+        self.profile = cProfile.Profile() if mode == "cprofile" else None
+        self.profile_lock = threading.Lock()
+        self.running = {}  # ID da thread -> quantidade de comandos em execução (modo "sample")
+        self.stacks = Counter()
+        self.samples = 0
+        self.done = threading.Event()
+
+    def start(self) -> None:
+        if self.mode == "sample":
+            threading.Thread(target=self.__sample, name="profiler", daemon=True).start()
+        timer = threading.Timer(self.duration, self.finish)
+        timer.daemon = True
+        timer.start()
+
+    def runcall(self, func, *args):
+        """Executa um comando sob a coleta de perfil."""
+        if self.mode == "cprofile":
+            if not self.done.is_set() and self.profile_lock.acquire(blocking=False):
+                try:
+                    return self.profile.runcall(func, *args)
+                finally:
+                    self.profile_lock.release()
+            return func(*args)
+
+        thread_id = threading.get_ident()
+        self.running[thread_id] = self.running.get(thread_id, 0) + 1
+        try:
+            return func(*args)
+        finally:
+            self.running[thread_id] -= 1
+
+    def finish(self) -> None:
+        """Encerra a coleta, grava o resultado e avisa o servidor."""
+        self.done.set()
+        try:
+            if self.mode == "cprofile":
+                with self.profile_lock:
+                    self.profile.dump_stats(self.path)
+            else:
+                with open(self.path, 'w', encoding='utf-8') as stacks_file:
+                    for stack, count in self.stacks.most_common():
+                        stacks_file.write(f"{stack} {count}\n")
+        except OSError as e:
+            print(f"Erro ao gravar o perfil em {self.path}: {str(e)}")
+        finally:
+            if self.on_finish:
+                self.on_finish()
+
+    def __sample(self) -> None:
+        while not self.done.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, count in list(self.running.items()):
+                frame = frames.get(thread_id)
+                if not count or frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
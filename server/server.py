@@ -1,15 +1,76 @@
+import heapq
+import os
+import re
+import selectors
 import socket
 import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from ds.avl_tree import AVLTree
-from datetime import datetime
+from admission import AdmissionController
+from idempotency import IdempotencyCache
+from namespace import FragmentCache, Namespace
+from worker_pool import WorkerPool
+from profiling import Profiler, SlowCommandLog
+from compression import ResponseCompressor
+from ds.shm_ring import ShmChannel
+from datetime import date, datetime
+
+
+class ClientSession:
+    """
+    Estado de uma conexão de cliente mantido pelo servidor entre um comando e outro.
+    """
+
+    def __init__(self, conn: socket.socket, limits) -> None:
+        """
+        Args:
+        conn (socket.socket): O socket de conexão com o cliente (ou o ShmChannel, na sessão de um canal
+            de memória compartilhada).
+        limits (ConnectionLimits): Os limites de taxa da conexão.
+        """
+        self.conn = conn
+        self.limits = limits
+        self.last_activity = time.monotonic()
+        self.namespace = None  # Lista de tarefas em uso (comando USE); None usa a lista padrão
+        self.compressor = None  # ResponseCompressor, criado pelo comando COMPRESS ON
+        self.channel = None  # ShmChannel aberto pelo comando SHM_OPEN, encerrado junto com a conexão
+        self.in_flight = False  # Comando entregue ao pool de trabalhadores e ainda não respondido
+        self.closed = False
+
 
 class TaskServer:
     """
     Classe responsável por gerenciar a comunicação com os clientes e o armazenamento das tarefas
     em uma árvore AVL (balanceada) para garantir eficiência nas operações.
     """
+
+    # Comandos de listagem respondidos diretamente como lista de buffers (sem montar uma string única)
+    BUFFERED_COMMANDS = {
+        "LIST": "uncompleted_task_buffers",
+        "LIST_DETAILED": "detailed_uncompleted_task_buffers",
+        "TASK_HISTORY": "task_history_buffers",
+    }
+    MAX_SEND_BUFFERS = 1024  # Limite de buffers por chamada de sendmsg (IOV_MAX)
+    MAX_BATCH_COMMANDS = 1000  # Comandos aceitos em um único BATCH
+    MUTATING_COMMANDS = {"ADD", "ADD_SUBTASK", "COMPLETE_SUBTASK", "REMOVE_SUBTASK", "REMOVE", "COMPLETE", "EDIT"}
+    VERSIONED_COMMANDS = {"LIST", "LIST_DETAILED", "TASK_HISTORY", "SEARCH", "LIST_SUBTASKS"}
+    DEADLINE_MAX_WAIT = 60.0  # Espera máxima do temporizador de vencimentos (reavalia mudanças no relógio)
+    DEADLINE_RETRY_WAIT = 1.0  # Espera do temporizador depois de uma falha, antes de tentar de novo
+    DEFAULT_NAMESPACE = "geral"  # Lista usada pelas conexões que não escolheram outra com USE
+    NAMESPACE_PREFIX = re.compile(r'\s*([^\s:]+):(?=\S)')  # "<lista>:<comando>" no início do comando
+    # Comandos aceitos depois de um prefixo de lista; com outro texto, "x:" é só parte de um comando inválido
+    PREFIXED_COMMANDS = MUTATING_COMMANDS | VERSIONED_COMMANDS | {
+        "POOL_STATS", "SUMMARY", "LIST_OVERDUE", "SLOW_LOG", "PROFILE", "KEY", "IF_VERSION"}
     
-    def __init__(self, host: str = 'localhost', port: int = 12345) -> None:
+    def __init__(self, host: str = 'localhost', port: int = 12345, task_tree=None,
+                 admission: AdmissionController = None, idle_timeout: float = 300.0,
+                 backlog: int = 128, keepalive: bool = True, workers: int = None,
+                 queue_depth: int = 256, max_queue_wait: float = None, slow_log: SlowCommandLog = None,
+                 profile_dir: str = None, tree_factory=None, max_namespaces: int = 10000,
+                 unix_path: str = None, shm_capacity: int = None, render_cache_bytes: int = 64 << 20,
+                 send_timeout: float = 30.0, idempotency_path: str = None, max_shm_channels: int = 16) -> None:
         """
         Inicializa o servidor com o endereço e a porta especificados, além de configurar a árvore AVL 
         e um mecanismo de lock para threads.
@@ -17,29 +78,511 @@ class TaskServer:
         Args:
         host (str): Endereço do servidor. Padrão é 'localhost'.
         port (int): Porta para comunicação. Padrão é 12345.
+        task_tree (optional): Armazenamento das tarefas da lista padrão, com a interface da AVL Tree
+            (insert/search/update/delete/inorder/getMax), como o MMapTaskStore. Padrão é uma AVLTree em memória.
+        admission (AdmissionController, optional): Limites de conexões e de taxa de requisições. Padrão são os
+            limites do AdmissionController.
+        idle_timeout (float): Segundos sem receber comandos até a conexão ser encerrada. None desativa. Padrão é 300.
+        send_timeout (float): Segundos que o envio de uma resposta pode ficar parado (cliente que não lê) até a
+            conexão ser encerrada. Separado de "idle_timeout", que vale só para a leitura. None desativa. Padrão é 30.
+        backlog (int): Tamanho máximo da fila de conexões pendentes em "listen". Padrão é 128.
+        keepalive (bool): Ativa o TCP keepalive nas conexões para detectar clientes mortos. Padrão é True.
+        workers (int, optional): Se informado, atende os clientes com um pool fixo de "workers" threads
+            alimentado por uma única thread de E/S, em vez de uma thread por cliente.
+        queue_depth (int): Capacidade da fila de comandos do pool. Padrão é 256.
+        max_queue_wait (float, optional): Tempo máximo, em segundos, que um comando pode esperar na fila do
+            pool antes de ser rejeitado. None não limita.
+        slow_log (SlowCommandLog, optional): Registro de comandos lentos com o tempo de cada fase. None desativa.
+        profile_dir (str, optional): Pasta onde o comando PROFILE grava os resultados. O PROFILE é um comando
+            administrativo: sem a pasta (padrão), ele fica desativado.
+        tree_factory (callable, optional): Recebe o nome de uma lista e cria o seu armazenamento. Padrão cria
+            uma AVLTree em memória.
+        max_namespaces (int): Quantidade máxima de listas de tarefas. Padrão é 10000.
+        unix_path (str, optional): Se informado, também escuta em um Unix domain socket neste caminho,
+            para clientes na mesma máquina.
+        shm_capacity (int, optional): Se informado, permite que clientes na mesma máquina abram, com SHM_OPEN,
+            um canal de memória compartilhada com buffers circulares desta capacidade (em bytes) em cada sentido.
+        max_shm_channels (int): Quantidade máxima de canais de memória compartilhada abertos ao mesmo tempo. Cada
+            canal é atendido por uma thread própria (fora do pool de "workers"), que consulta o canal mesmo
+            ociosa. Padrão é 16.
+        render_cache_bytes (int): Limite, em bytes, dos fragmentos de listagem guardados para todas as listas;
+            os usados há mais tempo são descartados. 0 desativa o cache. Padrão é 64 MiB.
+        idempotency_path (str, optional): Arquivo onde as chaves de idempotência (KEY) recentes são gravadas,
+            para que sobrevivam a uma reinicialização. Padrão mantém as chaves só em memória.
         """
         self.host = host
         self.port = port
-        self.task_tree = AVLTree()  # AVL Tree para gerenciar tarefas
-        self.next_id = 1  # Para gerar IDs únicos para as tarefas
-        self.lock = threading.Lock()  # Lock para proteger o acesso a dados compartilhados
+        self.unix_path = unix_path
+        self.shm_capacity = shm_capacity
+        self.shm_slots = threading.BoundedSemaphore(max_shm_channels)  # Uma vaga por canal (e thread) aberto
+        self.max_shm_channels = max_shm_channels
+        self.tree_factory = tree_factory or (lambda name: AVLTree())
+        self.max_namespaces = max_namespaces
+        self.namespaces = {}  # Nome -> Namespace, criadas sob demanda
+        self.namespaces_lock = threading.Lock()  # Protege apenas a criação de listas
+        self.rendered = FragmentCache(render_cache_bytes)  # Fragmentos de listagem de todas as listas (LRU)
+        self.local = threading.local()  # Lista de tarefas do comando em execução em cada thread
+        self.admission = admission or AdmissionController()
+        self.idle_timeout = idle_timeout
+        self.send_timeout = send_timeout
+        self.backlog = backlog
+        self.keepalive = keepalive
+        self.accept_poll_interval = 0.5  # Intervalo para verificar pedidos de desligamento no laço de accept
+        self.idle_check_interval = 1.0  # Intervalo entre as verificações de inatividade das conexões do pool
+        self.shutdown_deadline = 10.0  # Tempo máximo para drenar as conexões ao desligar
+        self.connections = set()  # Conexões ativas, drenadas no desligamento
+        self.connections_lock = threading.Lock()
+        self.connections_drained = threading.Condition(self.connections_lock)
+        self.ready = threading.Event()  # Sinalizado quando o servidor está escutando
+        self.stopping = threading.Event()  # Sinalizado quando o desligamento foi pedido
+        self.stopped = threading.Event()  # Sinalizado quando o desligamento terminou
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.max_queue_wait = max_queue_wait
+        self.pool = None  # WorkerPool, criado em "start" quando "workers" é informado
+        self.rearm = deque()  # Sessões devolvidas pelos trabalhadores à thread de E/S
+        self.wakeup_writer = None
+        self.idempotency_cache = IdempotencyCache(10000, idempotency_path)  # Chave de idempotência -> resposta já enviada (LRU)
+        self.idempotency_lock = threading.Lock()  # Protege apenas o cache e as chaves em execução
+        self.idempotency_pending = {}  # Chave em execução -> Event sinalizado quando ela termina
+        self.deadlines = []  # Min-heap de (vencimento ordinal, lista, ID da tarefa) das tarefas ainda não atrasadas
+        self.scheduled = {}  # (lista, ID da tarefa) -> vencimento da entrada válida da tarefa em "deadlines"
+        self.unscheduled = []  # Min-heap de (vencimento ordinal, lista) de prazos de tarefas carregadas, fora de "deadlines"
+        self.deadlines_lock = threading.Lock()
+        self.deadlines_changed = threading.Condition(self.deadlines_lock)  # Acorda o temporizador quando surge um prazo mais próximo
+        self.overdue_subscribers = []  # Callbacks chamados com a lista e o ID de cada tarefa que fica atrasada
+        self.slow_log = slow_log
+        self.profile_dir = profile_dir
+        self.profiler = None  # Profiler ativo, criado pelo comando PROFILE (None fora da coleta)
+        self.profiler_lock = threading.Lock()
+        self.default_namespace = self.create_namespace(self.DEFAULT_NAMESPACE, task_tree if task_tree is not None else AVLTree())
+
+    @property
+    def task_tree(self):
+        """Armazenamento da lista de tarefas em uso na thread atual."""
+        return self.current_namespace().task_tree
+
+    def current_namespace(self) -> Namespace:
+        """Retorna a lista de tarefas do comando em execução na thread atual (ou a lista padrão)."""
+        return getattr(self.local, 'namespace', None) or self.default_namespace
+
+    @contextmanager
+    def using_namespace(self, namespace: Namespace):
+        """Executa o bloco com "namespace" como lista de tarefas da thread atual."""
+        previous = getattr(self.local, 'namespace', None)
+        self.local.namespace = namespace
+        try:
+            yield namespace
+        finally:
+            self.local.namespace = previous
+
+    def get_namespace(self, name: str) -> Namespace:
+        """
+        Retorna a lista de tarefas com esse nome, criando-a na primeira vez que é usada.
+
+        Raises:
+        ValueError: Se o nome for inválido, o limite de listas tiver sido atingido ou o armazenamento
+            da lista não puder ser aberto.
+        """
+        namespace = self.namespaces.get(name)
+        if namespace is not None:
+            return namespace
+        if not Namespace.is_valid_name(name):
+            raise ValueError(f"nome de lista inválido: {name} (use letras, dígitos, '_' e '-', até 64 caracteres).")
+        with self.namespaces_lock:
+            namespace = self.namespaces.get(name)
+            if namespace is None:
+                if len(self.namespaces) >= self.max_namespaces:
+                    raise ValueError(f"limite de {self.max_namespaces} listas atingido.")
+                try:
+                    namespace = self.create_namespace(name, self.tree_factory(name))
+                except OSError as e:  # Ex.: limite de arquivos abertos do processo
+                    raise ValueError(f"não foi possível abrir o armazenamento da lista {name}: {e.strerror or e}.")
+            return namespace
+
+    def create_namespace(self, name: str, task_tree) -> Namespace:
+        """
+        Cria uma lista sobre um armazenamento e a registra em "namespaces". Se ele já tiver tarefas
+        (ex.: em disco), os contadores vêm do resumo gravado no último desligamento ("load_summary");
+        sem resumo válido, as tarefas são percorridas uma vez. Os prazos das tarefas carregadas não
+        entram no heap: apenas as datas de vencimento distintas são agendadas, e as tarefas de cada
+        data são procuradas quando ela passa. A lista é registrada antes de agendar as datas, pois o
+        temporizador procura a lista pelo nome assim que é acordado.
+        """
+        namespace = Namespace(name, task_tree, self.rendered)
+        if namespace.next_id == 1:
+            self.namespaces[name] = namespace
+            return namespace
+        load_summary = getattr(task_tree, 'load_summary', None)
+        summary = load_summary() if load_summary else None
+        with namespace.lock:
+            if summary is not None:
+                namespace.restore(summary)
+            else:
+                task_tree.inorder(lambda node: self.index_task(namespace, node.value))
+            due_dates = list(namespace.deadline_counts)
+        self.namespaces[name] = namespace
+        if due_dates:
+            with self.deadlines_changed:
+                for due_date in due_dates:
+                    heapq.heappush(self.unscheduled, (due_date, name))
+                self.deadlines_changed.notify_all()
+        return namespace
+
+    def split_namespace(self, command: str) -> tuple:
+        """
+        Separa o prefixo de lista de um comando ("<lista>:<comando>"). Só há prefixo quando o
+        que vem depois dele é um comando conhecido: "http://..." não cria uma lista "http".
+
+        Returns:
+        tuple: O nome da lista (ou None, se não houver prefixo) e o comando sem o prefixo.
+        """
+        match = self.NAMESPACE_PREFIX.match(command)
+        if not match:
+            return None, command
+        rest = command[match.end():]
+        parts = rest.split(maxsplit=1)
+        if parts[0].upper() not in self.PREFIXED_COMMANDS:
+            return None, command
+        return match.group(1), rest
     
     def start(self) -> None:
         """
         Inicia o servidor socket, aceita conexões de clientes e cria uma nova thread para cada cliente.
         O servidor escuta na porta especificada e trata múltiplos clientes simultaneamente.
+
+        Com "unix_path", o servidor também escuta em um Unix domain socket; as conexões dos dois
+        sockets são atendidas da mesma forma.
+
+        O laço de accept termina quando "stop" (ou "shutdown") é chamado ou com Ctrl+C; em seguida as
+        conexões ativas são drenadas e o estado persistido é gravado antes de retornar.
         """
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_socket:
+        listeners = []
+        try:
+            server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listeners.append(server_socket)
             server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             server_socket.bind((self.host, self.port))
-            server_socket.listen()
-            print(f"Servidor iniciado em {self.host}:{self.port}")
+            self.port = server_socket.getsockname()[1]  # Porta real, caso tenha sido pedida a porta 0
+            if self.unix_path:
+                unix_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                listeners.append(unix_socket)
+                if os.path.exists(self.unix_path):
+                    os.unlink(self.unix_path)  # Socket deixado por uma execução anterior
+                unix_socket.bind(self.unix_path)
+            for listener in listeners:
+                listener.listen(self.backlog)
+                listener.settimeout(self.accept_poll_interval)
+            print(f"Servidor iniciado em {self.host}:{self.port}" + (f" e em {self.unix_path}" if self.unix_path else ""))
+            threading.Thread(target=self.deadline_loop, name="deadlines", daemon=True).start()
+            self.ready.set()
 
-            while True:
-                conn, addr = server_socket.accept()
-                print(f"Conectado a {addr}")
-                client_thread = threading.Thread(target=self.handle_client, args=(conn,))
-                client_thread.start()
+            try:
+                if self.workers:
+                    self.pool_loop(listeners)
+                else:
+                    self.accept_loop(listeners)
+            except KeyboardInterrupt:
+                print("Interrompido, desligando o servidor...")
+                self.stopping.set()
+        finally:
+            for listener in listeners:
+                listener.close()
+            if self.unix_path and len(listeners) > 1 and os.path.exists(self.unix_path):
+                os.unlink(self.unix_path)
+
+        self.drain_connections(self.shutdown_deadline)
+        self.stopped.set()
+        print("Servidor encerrado.")
+
+    def accept_loop(self, listeners: list) -> None:
+        """
+        Aceita conexões até que o desligamento seja pedido, criando uma thread por cliente.
+
+        Args:
+        listeners (list): Os sockets que escutam novas conexões (TCP e, opcionalmente, Unix).
+        """
+        with selectors.DefaultSelector() as selector:
+            for listener in listeners:
+                selector.register(listener, selectors.EVENT_READ)
+            while not self.stopping.is_set():
+                for key, _ in selector.select(self.accept_poll_interval):
+                    try:
+                        conn = self.accept_client(key.fileobj)
+                    except socket.timeout:
+                        continue
+                    if conn is None:
+                        continue
+                    with self.connections_lock:
+                        self.connections.add(conn)
+                    client_thread = threading.Thread(target=self.handle_client, args=(conn,))
+                    client_thread.start()
+
+    def pool_loop(self, listeners: list) -> None:
+        """
+        Atende os clientes com um pool fixo de trabalhadores. Esta thread (de E/S) multiplexa todos os
+        sockets com um selector e entrega cada comando recebido ao pool pela fila limitada. Enquanto um
+        comando da conexão está no pool, o socket sai do selector, preservando a ordem das respostas.
+
+        Args:
+        listeners (list): Os sockets que escutam novas conexões (TCP e, opcionalmente, Unix).
+        """
+        self.pool = WorkerPool(self.serve_pooled, self.workers, self.queue_depth, self.max_queue_wait)
+        self.pool.start()
+        wakeup_reader, self.wakeup_writer = socket.socketpair()
+        self.wakeup_writer.setblocking(False)
+        selector = selectors.DefaultSelector()
+        for listener in listeners:
+            selector.register(listener, selectors.EVENT_READ)
+        selector.register(wakeup_reader, selectors.EVENT_READ)
+        sessions = set()
+        next_idle_check = time.monotonic() + self.idle_check_interval
+
+        try:
+            while not self.stopping.is_set():
+                for key, _ in selector.select(self.accept_poll_interval):
+                    if key.fileobj in listeners:
+                        conn = self.accept_client(key.fileobj)
+                        if conn is not None:
+                            session = ClientSession(conn, self.admission.connection_limits())
+                            sessions.add(session)
+                            selector.register(conn, selectors.EVENT_READ, session)
+                    elif key.fileobj is wakeup_reader:
+                        wakeup_reader.recv(4096)
+                        while self.rearm:
+                            session = self.rearm.popleft()
+                            session.in_flight = False
+                            if session.closed:
+                                sessions.discard(session)
+                            else:
+                                selector.register(session.conn, selectors.EVENT_READ, session)
+                    else:
+                        self.read_pooled(selector, key.data)
+                        if key.data.closed:
+                            sessions.discard(key.data)
+                now = time.monotonic()
+                if now >= next_idle_check:  # Em intervalos fixos, não a cada evento do selector
+                    self.expire_idle_sessions(selector, sessions)
+                    next_idle_check = now + self.idle_check_interval
+        finally:
+            self.pool.shutdown(self.shutdown_deadline)  # Drena os comandos que já estão na fila
+            for session in sessions:
+                self.close_session(session)
+            selector.close()
+            wakeup_reader.close()
+            self.wakeup_writer.close()
+
+    def read_pooled(self, selector: selectors.BaseSelector, session: ClientSession) -> None:
+        """
+        Lê um comando de uma conexão pronta e o entrega ao pool. Se a fila estiver cheia, o
+        cliente recebe a rejeição imediatamente, sem bloquear a thread de E/S ("send_nowait").
+        """
+        try:
+            data = session.conn.recv(1024)
+        except OSError:
+            data = b''
+        if not data:
+            selector.unregister(session.conn)
+            self.close_session(session)
+            return
+
+        session.last_activity = time.monotonic()
+        if self.pool.submit((session, data)):
+            session.in_flight = True
+            selector.unregister(session.conn)
+            return
+        if not self.send_nowait(session, "Erro: servidor sobrecarregado. Tente novamente mais tarde."):
+            selector.unregister(session.conn)
+            self.close_session(session)
+
+    def send_nowait(self, session: ClientSession, message: str) -> bool:
+        """
+        Envia uma resposta curta pela thread de E/S sem bloquear: se ela não couber no buffer de
+        envio do socket (cliente que não lê as respostas), o envio falha e a conexão deve ser
+        encerrada, em vez de travar o selector de todas as conexões.
+
+        Args:
+        session (ClientSession): A sessão da conexão (fora do pool).
+        message (str): A resposta.
+
+        Returns:
+        bool: True se a resposta foi enviada por inteiro.
+        """
+        timeout = session.conn.gettimeout()
+        session.conn.setblocking(False)
+        try:
+            self.send_buffers(session.conn, self.frame_response(session, [message.encode()]))
+            return True
+        except OSError:  # Inclui BlockingIOError (EAGAIN)
+            return False
+        finally:
+            session.conn.settimeout(timeout)
+
+    def serve_pooled(self, item: tuple, expired: bool) -> None:
+        """
+        Executado por uma thread do pool: processa o comando, envia a resposta e devolve a
+        sessão à thread de E/S.
+        """
+        session, data = item
+        trace = self.slow_log.begin(data.decode(errors='replace')) if self.slow_log else None
+        compressor = session.compressor  # A resposta ao próprio COMPRESS usa o modo anterior
+        if expired:
+            response = ["Erro: servidor sobrecarregado. Tente novamente mais tarde.".encode()]
+        else:
+            try:
+                response = self.dispatch_command(data.decode(), session, trace)
+            except Exception as e:
+                response = [f"Erro no servidor: {str(e)}".encode()]
+        if compressor:
+            response = compressor.frame(response)
+            if trace:
+                trace.mark('compress')
+        try:
+            self.send_buffers(session.conn, response)
+            session.last_activity = time.monotonic()
+        except OSError:
+            self.close_session(session)
+        if trace:
+            self.slow_log.finish(trace)
+
+        self.rearm.append(session)
+        try:
+            self.wakeup_writer.send(b'\0')
+        except OSError:
+            pass  # Thread de E/S já foi acordada (buffer cheio) ou está encerrando
+
+    def expire_idle_sessions(self, selector: selectors.BaseSelector, sessions: set) -> None:
+        """
+        Encerra as conexões do pool que passaram do timeout de inatividade. Chamado pela thread
+        de E/S a cada "idle_check_interval" segundos; o aviso ao cliente não bloqueia.
+        """
+        if self.idle_timeout is None:
+            return
+        limit = time.monotonic() - self.idle_timeout
+        # Conexões com canal de memória compartilhada aberto são acompanhadas pelo próprio canal
+        for session in [s for s in sessions if not s.in_flight and s.channel is None and s.last_activity < limit]:
+            self.send_nowait(session, "Conexão encerrada por inatividade.")
+            selector.unregister(session.conn)
+            self.close_session(session)
+            sessions.discard(session)
+
+    def close_session(self, session: ClientSession) -> None:
+        """Fecha a conexão de uma sessão do pool e libera sua vaga de conexão."""
+        if session.closed:
+            return
+        session.closed = True
+        if session.channel:
+            session.channel.shutdown()
+        session.conn.close()
+        self.admission.release_connection()
+
+    def pool_stats(self) -> str:
+        """Retorna o estado do pool de trabalhadores (tamanho, fila e tempos de espera)."""
+        if self.pool is None:
+            return "Pool de trabalhadores desativado."
+        stats = self.pool.stats()
+        return (f"Trabalhadores: {stats['workers']} (ocupados: {stats['busy']}), "
+                f"Fila: {stats['queued']}/{stats['queue_depth']}, "
+                f"Processados: {stats['processed']}, Rejeitados: {stats['rejected']}, Expirados: {stats['expired']}, "
+                f"Espera média: {stats['avg_wait_ms']:.2f} ms, Espera máxima: {stats['max_wait_ms']:.2f} ms")
+
+    def accept_client(self, server_socket: socket.socket) -> socket.socket:
+        """
+        Aceita uma conexão pendente, aplicando o limite de conexões do controle de admissão.
+
+        Args:
+        server_socket (socket.socket): O socket que escuta novas conexões.
+
+        Returns:
+        socket.socket: A conexão configurada, ou None se ela foi recusada.
+        """
+        conn, addr = server_socket.accept()
+        if not self.admission.admit_connection():
+            print(f"Conexão de {addr} recusada: limite de conexões atingido")
+            with conn:
+                conn.sendall("Erro: servidor lotado. Tente novamente mais tarde.".encode())
+            return None
+        print(f"Conectado a {addr or self.unix_path}")
+        self.configure_connection(conn)
+        return conn
+
+    def configure_connection(self, conn: socket.socket) -> None:
+        """
+        Aplica o timeout de envio e o TCP keepalive a uma conexão aceita (o keepalive não se
+        aplica às conexões pelo Unix domain socket). O timeout de inatividade é aplicado apenas
+        às leituras, por "handle_client" (no modo pool, pela verificação da thread de E/S).
+
+        Args:
+        conn (socket.socket): O socket de conexão com o cliente.
+        """
+        conn.settimeout(self.send_timeout)
+        if self.keepalive and conn.family in (socket.AF_INET, socket.AF_INET6):
+            conn.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            # Ajustes finos disponíveis apenas em algumas plataformas (ex.: Linux)
+            for option, value in (('TCP_KEEPIDLE', 60), ('TCP_KEEPINTVL', 10), ('TCP_KEEPCNT', 5)):
+                if hasattr(socket, option):
+                    conn.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+    def stop(self) -> None:
+        """Pede o desligamento do servidor sem esperar que ele termine (seguro para tratadores de sinal)."""
+        self.stopping.set()
+
+    def shutdown(self, timeout: float = None) -> bool:
+        """
+        Desliga o servidor: para de aceitar conexões, drena os comandos em andamento e
+        grava o estado persistido.
+
+        Args:
+        timeout (float, optional): Tempo máximo de espera. None espera indefinidamente.
+
+        Returns:
+        bool: True se o servidor terminou dentro do prazo.
+        """
+        self.stop()
+        return self.stopped.wait(timeout)
+
+    def drain_connections(self, deadline: float) -> None:
+        """
+        Encerra a leitura das conexões ativas, deixando que os comandos em andamento terminem
+        e enviem suas respostas. Conexões que não terminarem dentro do prazo são fechadas à força.
+        Por fim, grava o armazenamento de tarefas em disco, se ele oferecer "flush", junto com o
+        resumo dos contadores ("save_summary"), que evita percorrer as tarefas na próxima partida.
+
+        Args:
+        deadline (float): Tempo máximo, em segundos, para drenar as conexões.
+        """
+        with self.connections_lock:
+            active = list(self.connections)
+        for conn in active:
+            try:
+                conn.shutdown(socket.SHUT_RD)  # O próximo recv retorna vazio e a thread termina
+            except OSError:
+                pass
+
+        limit = time.monotonic() + deadline
+        with self.connections_lock:
+            while self.connections and time.monotonic() < limit:
+                self.connections_drained.wait(limit - time.monotonic())
+            remaining = list(self.connections)
+        for conn in remaining:
+            print("Conexão não drenada dentro do prazo, fechando à força")
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+        for namespace in list(self.namespaces.values()):
+            with namespace.lock:
+                save_summary = getattr(namespace.task_tree, 'save_summary', None)
+                if save_summary:
+                    save_summary(namespace.snapshot())  # Evita percorrer as tarefas na próxima partida
+                flush = getattr(namespace.task_tree, 'flush', None)
+                if flush:
+                    flush()
+        with self.idempotency_lock:
+            self.idempotency_cache.close()
+        with self.deadlines_changed:
+            self.deadlines_changed.notify_all()  # Encerra o temporizador de vencimentos
     
     def handle_client(self, conn: socket.socket) -> None:
         """
@@ -48,17 +591,386 @@ class TaskServer:
         Args:
         conn (socket.socket): O socket de conexão com o cliente.
         """
-        with conn:
-            while True:
-                try:
-                    data = conn.recv(1024)
+        session = ClientSession(conn, self.admission.connection_limits())
+        try:
+            with conn:
+                while True:
+                    conn.settimeout(self.idle_timeout)  # O timeout de envio vale só durante "send_reply"
+                    try:
+                        data = conn.recv(1024)
+                    except socket.timeout:
+                        if session.channel and not session.channel.is_closed():
+                            continue  # Comandos chegam pelo canal de memória compartilhada
+                        self.send_reply(conn, self.frame_response(session, ["Conexão encerrada por inatividade.".encode()]))
+                        break
+                    except (ConnectionError, OSError):
+                        break  # Cliente desconectado ou conexão fechada no desligamento
                     if not data:
                         break
-                    response = self.process_command(data.decode())
-                    conn.sendall(response.encode())
-                except Exception as e:
-                    conn.sendall(f"Erro no servidor: {str(e)}".encode())
+                    try:
+                        trace = self.slow_log.begin(data.decode(errors='replace')) if self.slow_log else None
+                        compressor = session.compressor  # A resposta ao próprio COMPRESS usa o modo anterior
+                        response = self.dispatch_command(data.decode(), session, trace)
+                        if compressor:
+                            response = compressor.frame(response)
+                            if trace:
+                                trace.mark('compress')
+                        self.send_reply(conn, response)
+                        if trace:
+                            self.slow_log.finish(trace)
+                    except (ConnectionError, OSError):
+                        break  # Cliente desconectado, que não lê as respostas (send_timeout) ou fechado no desligamento
+                    except Exception as e:
+                        self.send_reply(conn, self.frame_response(session, [f"Erro no servidor: {str(e)}".encode()]))
+                        break
+        except OSError:
+            pass  # Falha ao enviar a mensagem de erro para um cliente que já saiu
+        finally:
+            if session.channel:
+                session.channel.shutdown()
+            self.admission.release_connection()
+            with self.connections_lock:
+                self.connections.discard(conn)
+                self.connections_drained.notify_all()
+
+    def send_reply(self, conn: socket.socket, buffers: list) -> None:
+        """
+        Envia uma resposta com o timeout de envio ("send_timeout"), e não com o de inatividade
+        usado na leitura: um cliente que para de ler é desconectado sem esperar "idle_timeout".
+
+        Raises:
+        socket.timeout: Se o envio ficar parado por mais que "send_timeout".
+        """
+        conn.settimeout(self.send_timeout)
+        self.send_buffers(conn, buffers)
+
+    def dispatch_command(self, command: str, session: ClientSession, trace=None) -> list:
+        """
+        Passa o comando pelo controle de admissão antes de processá-lo. Comandos
+        rejeitados recebem a resposta de erro imediatamente, sem serem executados.
+
+        As listagens são respondidas com os fragmentos já codificados de cada tarefa,
+        sem concatená-los; os demais comandos passam por "process_command".
+
+        Args:
+        command (str): O comando recebido do cliente.
+        session (ClientSession): A sessão da conexão que enviou o comando.
+        trace (CommandTrace, optional): Acompanhamento do comando pelo registro de comandos lentos.
+
+        Returns:
+        list: Os buffers (bytes) da resposta, a serem enviados em sequência.
+        """
+        name, command = self.split_namespace(command)
+        parts = command.split(maxsplit=2)
+        action = parts[0].upper() if parts else ""
+        condition = None
+        if action == "IF_VERSION" and len(parts) == 3:
+            condition, command = parts[1], parts[2]
+            action = self.split_namespace(command)[1].split(maxsplit=1)[0].upper()
+
+        if action == "USE":
+            return [self.use_namespace(session, parts[1:]).encode()]
+        if action == "COMPRESS":
+            return self.negotiate_compression(session, parts[1:])
+        if action == "SHM_OPEN":
+            return [self.open_shm_channel(session).encode()]
+
+        # Cada linha de um BATCH passa pela admissão separadamente, em "process_batch"
+        admitted = None if action == "BATCH" else self.admission_action(command)
+        rejection = self.admission.admit(session.limits, admitted) if admitted is not None else None
+        if trace:
+            trace.mark('parse')
+        if rejection:
+            return [rejection.encode()]
+
+        response = []
+        try:
+            try:  # Só depois da admissão: comandos rejeitados não criam listas
+                namespace = self.get_namespace(name) if name is not None else session.namespace
+            except ValueError as e:
+                response = [f"Erro: {str(e)}".encode()]
+                return response
+            with self.using_namespace(namespace):
+                profiler = self.profiler
+                if profiler:
+                    response = profiler.runcall(self.execute_command, action, condition, command, session.limits)
+                else:
+                    response = self.execute_command(action, condition, command, session.limits)
+            return response
+        finally:
+            if trace:
+                trace.mark('execute')
+            if admitted is not None:
+                self.admission.complete(session.limits, admitted, sum(len(buffer) for buffer in response))
+
+    def admission_action(self, command: str) -> str:
+        """
+        Retorna o comando que classifica uma requisição no controle de admissão: os prefixos
+        de lista, KEY e IF_VERSION são removidos, para que uma leitura embrulhada neles seja
+        cobrada como leitura.
+        """
+        command = self.split_namespace(command)[1]
+        parts = command.split(maxsplit=2)
+        while len(parts) == 3 and parts[0].upper() in ("KEY", "IF_VERSION"):
+            command = self.split_namespace(parts[2])[1]
+            parts = command.split(maxsplit=2)
+        return parts[0].upper() if parts else ""
+
+    def use_namespace(self, session: ClientSession, args: list) -> str:
+        """
+        Troca a lista de tarefas usada pelos próximos comandos da conexão (comando USE).
+
+        Args:
+        session (ClientSession): A sessão da conexão.
+        args (list): O nome da lista (vazio para apenas consultar a lista em uso).
+
+        Returns:
+        str: Confirmação ou mensagem de erro.
+        """
+        if not args:
+            return f"Lista em uso: {(session.namespace or self.default_namespace).name}."
+        try:
+            session.namespace = self.get_namespace(args[0])
+        except ValueError as e:
+            return f"Erro: {str(e)}"
+        return f"Usando a lista {session.namespace.name}."
+
+    def negotiate_compression(self, session: ClientSession, args: list) -> list:
+        """
+        Liga ou desliga a compressão das respostas da conexão (comando COMPRESS).
+
+        "COMPRESS ON [limite]" responde, ainda sem quadro, "COMPRESSION ON <limite> <tamanho>"
+        seguido de uma quebra de linha e do dicionário do fluxo deflate, que o cliente usa para
+        descomprimir; a partir da próxima resposta, todas são enviadas em quadros. "COMPRESS OFF"
+        volta ao modo sem quadros depois da sua própria resposta. Sem argumento, mostra o estado.
+
+        Args:
+        session (ClientSession): A sessão da conexão.
+        args (list): "ON" (com o limite opcional, em bytes), "OFF" ou vazio.
+
+        Returns:
+        list: Os buffers (bytes) da resposta.
+        """
+        mode = args[0].upper() if args else ""
+        if not mode:
+            return [(session.compressor.stats() if session.compressor else "Compressão desativada.").encode()]
+        if mode == "OFF":
+            session.compressor = None
+            return ["Compressão desativada.".encode()]
+        if isinstance(session.conn, ShmChannel):
+            return ["Erro: o canal de memória compartilhada não usa compressão.".encode()]
+        if mode != "ON" or len(args) > 2:
+            return ["Erro: use COMPRESS ON [limite em bytes] ou COMPRESS OFF.".encode()]
+        try:
+            threshold = int(args[1]) if len(args) == 2 else ResponseCompressor.DEFAULT_THRESHOLD
+        except ValueError:
+            return ["Erro: o limite de compressão deve ser um número.".encode()]
+        if session.compressor:
+            return ["Erro: compressão já está ativa nesta conexão.".encode()]
+        session.compressor = ResponseCompressor(max(0, threshold))
+        dictionary = ResponseCompressor.DICTIONARY
+        return [f"COMPRESSION ON {session.compressor.threshold} {len(dictionary)}\n".encode(), dictionary]
+
+    def open_shm_channel(self, session: ClientSession) -> str:
+        """
+        Abre um canal de memória compartilhada para a conexão (comando SHM_OPEN), atendido por uma
+        thread própria. Responde "SHM <nome> <capacidade>"; o cliente se conecta ao bloco com esse
+        nome e passa a enviar os comandos pelo canal, mantendo a conexão aberta: fechar a conexão
+        encerra o canal e vice-versa. No máximo "max_shm_channels" canais ficam abertos ao mesmo
+        tempo; além disso, o cliente recebe um erro e continua usando a conexão.
+
+        Args:
+        session (ClientSession): A sessão da conexão.
+
+        Returns:
+        str: O nome e a capacidade do canal, ou uma mensagem de erro.
+        """
+        if not self.shm_capacity:
+            return "Erro: transporte de memória compartilhada desativado neste servidor."
+        if isinstance(session.conn, ShmChannel) or session.channel:
+            return "Erro: esta conexão já usa um canal de memória compartilhada."
+        if session.conn.family != socket.AF_UNIX and session.conn.getpeername()[0] not in ('127.0.0.1', '::1'):
+            return "Erro: o canal de memória compartilhada só está disponível para clientes locais."
+        if not self.shm_slots.acquire(blocking=False):
+            return f"Erro: limite de {self.max_shm_channels} canais de memória compartilhada atingido."
+        try:
+            session.channel = ShmChannel.create(self.shm_capacity)
+        except OSError as e:
+            self.shm_slots.release()
+            return f"Erro ao criar o canal de memória compartilhada: {str(e)}"
+        channel_session = ClientSession(session.channel, session.limits)
+        threading.Thread(target=self.serve_shm, args=(session, channel_session), name="shm", daemon=True).start()
+        return f"SHM {session.channel.name} {session.channel.capacity}"
+
+    def serve_shm(self, session: ClientSession, channel_session: ClientSession) -> None:
+        """
+        Atende os comandos recebidos pelo canal de memória compartilhada de uma conexão até que o
+        canal seja encerrado ou fique inativo por "idle_timeout" segundos. Ao terminar, libera o
+        canal e a sua vaga em "shm_slots" e encerra a conexão de controle.
+
+        Args:
+        session (ClientSession): A sessão da conexão que abriu o canal.
+        channel_session (ClientSession): A sessão do canal (mesmos limites de taxa da conexão).
+        """
+        channel = channel_session.conn
+        try:
+            while True:
+                data = channel.receive(self.idle_timeout)
+                if data is None:
+                    channel.send(["Conexão encerrada por inatividade.".encode()])
                     break
+                session.last_activity = channel_session.last_activity = time.monotonic()
+                trace = self.slow_log.begin(data.decode(errors='replace')) if self.slow_log else None
+                try:
+                    response = self.dispatch_command(data.decode(), channel_session, trace)
+                except Exception as e:
+                    response = [f"Erro no servidor: {str(e)}".encode()]
+                channel.send(response)
+                if trace:
+                    self.slow_log.finish(trace)
+        except ConnectionResetError:
+            pass  # Canal encerrado pelo cliente ou pelo fechamento da conexão
+        finally:
+            channel.close()
+            self.shm_slots.release()
+            try:
+                session.conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def frame_response(self, session: ClientSession, buffers: list) -> list:
+        """Enquadra (e comprime, se for o caso) uma resposta para uma conexão com compressão ativa."""
+        return session.compressor.frame(buffers) if session.compressor else buffers
+
+    def execute_command(self, action: str, condition: str, command: str, limits=None) -> list:
+        """
+        Executa um comando já admitido e devolve os buffers (bytes) da resposta. "limits" (os
+        limites da conexão) é usado para admitir cada linha de um BATCH.
+        """
+        if condition is not None:
+            return self.conditional_buffers(condition, command)
+        if action == "BATCH":
+            return [self.process_batch(command, limits).encode()]
+        if action in self.BUFFERED_COMMANDS:
+            return getattr(self, self.BUFFERED_COMMANDS[action])()
+        return [self.process_command(command).encode()]
+
+    def conditional_buffers(self, condition: str, command: str) -> list:
+        """
+        Executa uma leitura condicional (IF_VERSION). Se a versão informada pelo cliente ainda é
+        a atual, responde apenas "NOT_MODIFIED <versão>"; caso contrário, responde
+        "VERSION <versão> <tamanho>" seguido da resposta completa do comando, onde "tamanho" é o
+        número de bytes da resposta: assim o cliente sabe quando terminou de ler os dados que guarda.
+
+        A versão é lida antes dos dados: se uma alteração ocorrer no meio, o cliente recebe
+        dados mais novos que a versão e apenas busca a resposta completa de novo na próxima vez.
+
+        Args:
+        condition (str): A versão da última resposta que o cliente guardou.
+        command (str): O comando de leitura.
+
+        Returns:
+        list: Os buffers (bytes) da resposta.
+        """
+        name, command = self.split_namespace(command)
+        if name is not None:
+            try:
+                namespace = self.get_namespace(name)
+            except ValueError as e:
+                return [f"Erro: {str(e)}".encode()]
+            with self.using_namespace(namespace):
+                return self.conditional_buffers(condition, command)
+
+        tag = self.version_tag(command)
+        if tag is None:
+            return [f"Erro: IF_VERSION só se aplica a {', '.join(sorted(self.VERSIONED_COMMANDS))}.".encode()]
+        if tag == condition:
+            return [f"NOT_MODIFIED {tag}".encode()]
+
+        action = command.split(maxsplit=1)[0].upper()
+        if action in self.BUFFERED_COMMANDS:
+            body = getattr(self, self.BUFFERED_COMMANDS[action])()
+        else:
+            body = [self.process_command(command).encode()]
+        return [f"VERSION {tag} {sum(len(buffer) for buffer in body)}\n".encode()] + body
+
+    def version_tag(self, command: str) -> str:
+        """
+        Calcula a versão atual dos dados lidos por um comando: a versão da lista para as
+        listagens e a versão da tarefa para SEARCH/LIST_SUBTASKS.
+
+        Returns:
+        str: A versão no formato "<época>.<número>", ou None se o comando não é versionado.
+        """
+        parts = command.split()
+        action = parts[0].upper() if parts else ""
+        if action not in self.VERSIONED_COMMANDS:
+            return None
+        namespace = self.current_namespace()
+        if action in ("SEARCH", "LIST_SUBTASKS"):
+            try:
+                return f"{namespace.epoch}.{namespace.task_versions.get(int(parts[1]), 0)}"
+            except (IndexError, ValueError):
+                return None
+        return f"{namespace.epoch}.{namespace.version}"
+
+    def process_batch(self, command: str, limits=None) -> str:
+        """
+        Processa um lote de comandos, um por linha após a linha "BATCH", enviado de uma vez
+        pelo cliente ao reenviar sua fila de saída. Com "limits", cada linha passa pelo controle
+        de admissão como uma requisição própria; as linhas rejeitadas recebem a mensagem de erro
+        e as demais são executadas.
+
+        Args:
+        command (str): O texto do lote.
+        limits (ConnectionLimits, optional): Os limites da conexão que enviou o lote.
+
+        Returns:
+        str: As respostas de cada comando, numeradas na ordem do lote, cada uma terminada por uma quebra de linha.
+        """
+        commands = [line for line in command.split('\n')[1:] if line.strip()]
+        if len(commands) > self.MAX_BATCH_COMMANDS:
+            return f"Erro: lote com mais de {self.MAX_BATCH_COMMANDS} comandos."
+        responses = []
+        for number, line in enumerate(commands, 1):
+            if limits is None:
+                responses.append(f"[{number}] {self.process_command(line)}")
+                continue
+            action = self.admission_action(line)
+            rejection = self.admission.admit(limits, action)
+            if rejection:
+                responses.append(f"[{number}] {rejection}")
+                continue
+            response = ""
+            try:
+                response = self.process_command(line)
+            finally:
+                self.admission.complete(limits, action, len(response.encode()))
+            responses.append(f"[{number}] {response}")
+        return f"Lote com {len(commands)} comandos:\n" + "".join(response + "\n" for response in responses)
+
+    def send_buffers(self, conn: socket.socket, buffers: list) -> None:
+        """
+        Envia uma lista de buffers sem concatená-los, usando E/S vetorizada (sendmsg).
+        Envios parciais continuam a partir de fatias (memoryview) do buffer interrompido.
+
+        Args:
+        conn (socket.socket): O socket de conexão com o cliente.
+        buffers (list): Os buffers (bytes) a serem enviados, em ordem.
+        """
+        if not hasattr(conn, 'sendmsg'):  # Plataformas sem E/S vetorizada (ex.: Windows)
+            conn.sendall(b''.join(buffers))
+            return
+
+        pending = [memoryview(buffer) for buffer in buffers if buffer]
+        start = 0
+        while start < len(pending):
+            sent = conn.sendmsg(pending[start:start + self.MAX_SEND_BUFFERS])
+            while start < len(pending) and sent >= len(pending[start]):
+                sent -= len(pending[start])
+                start += 1
+            if sent:
+                pending[start] = pending[start][sent:]
 
     def process_command(self, command: str) -> str:
         """
@@ -73,8 +985,33 @@ class TaskServer:
         - SEARCH <id>: Busca uma tarefa pelo ID
         - COMPLETE <id>: Marca uma tarefa como concluída
         - ADD_SUBTASK <id> <descrição>: Adiciona uma subtarefa a uma tarefa existente
+        - COMPLETE_SUBTASK <id> <id da subtarefa>: Marca uma subtarefa como concluída
+        - REMOVE_SUBTASK <id> <id da subtarefa>: Remove uma subtarefa
         - LIST_SUBTASKS <id>: Lista todas as subtarefas de uma tarefa
+        - POOL_STATS: Mostra o estado do pool de trabalhadores (quando ativo)
+        - SUMMARY: Resume a quantidade de tarefas por prioridade, situação e vencimento
+        - LIST_OVERDUE: Lista as tarefas não concluídas cujo vencimento já passou
+        - SLOW_LOG: Mostra os comandos lentos registrados, com o tempo de cada fase
+        - PROFILE <segundos> [CPROFILE|SAMPLE]: Coleta um perfil dos comandos por alguns segundos e grava em arquivo
+        - USE <lista>: Troca a lista de tarefas da conexão (tratado em "dispatch_command")
+        - <lista>:<comando>: Executa um comando em outra lista de tarefas, sem trocar a lista da conexão
+        - COMPRESS ON [limite] | OFF: Liga ou desliga a compressão das respostas da conexão (tratado em "dispatch_command")
+        - SHM_OPEN: Abre um canal de memória compartilhada para clientes locais (tratado em "dispatch_command")
+        - KEY <chave> <comando>: Executa o comando uma única vez por chave de idempotência; repetições
+          recebem a resposta original sem executar o comando de novo
+        - BATCH: Seguido de um comando por linha, executa um lote de comandos (tratado em "dispatch_command")
+        - IF_VERSION <versão> <comando>: Leitura condicional de LIST, LIST_DETAILED, TASK_HISTORY, SEARCH ou
+          LIST_SUBTASKS; responde NOT_MODIFIED se os dados não mudaram desde a versão informada
         """
+        name, command = self.split_namespace(command)
+        if name is not None:
+            try:
+                namespace = self.get_namespace(name)
+            except ValueError as e:
+                return f"Erro: {str(e)}"
+            with self.using_namespace(namespace):
+                return self.process_command(command)
+
         parts = command.split()
 
         if not parts:
@@ -82,6 +1019,19 @@ class TaskServer:
 
         action = parts[0].upper()
 
+        if action in ("USE", "COMPRESS", "SHM_OPEN"):
+            return f"Erro: {action} deve ser enviado como um comando isolado."
+
+        if action == "KEY":
+            if len(parts) < 3:
+                return "Erro: chave de idempotência ou comando não fornecido."
+            return self.process_idempotent(parts[1], command.split(maxsplit=2)[2])
+
+        if action == "IF_VERSION":
+            if len(parts) < 3:
+                return "Erro: versão ou comando não fornecido."
+            return b''.join(self.conditional_buffers(parts[1], command.split(maxsplit=2)[2])).decode()
+
         if action == "ADD":
             if len(parts) < 2:
                 return "Erro: descrição da tarefa não fornecida."
@@ -120,6 +1070,18 @@ class TaskServer:
             except ValueError:
                 return "Erro: ID da tarefa deve ser um número."
 
+        elif action in ("COMPLETE_SUBTASK", "REMOVE_SUBTASK"):
+            if len(parts) != 3:
+                return "Erro: ID da tarefa ou da subtarefa não fornecido."
+            try:
+                task_id = int(parts[1])
+                subtask_id = int(parts[2])
+            except ValueError:
+                return "Erro: IDs da tarefa e da subtarefa devem ser números."
+            if action == "COMPLETE_SUBTASK":
+                return self.complete_subtask(task_id, subtask_id)
+            return self.remove_subtask(task_id, subtask_id)
+
         elif action == "LIST_SUBTASKS":
             if len(parts) != 2:
                 return "Erro: ID da tarefa não fornecido."
@@ -138,6 +1100,30 @@ class TaskServer:
         elif action == "TASK_HISTORY":
             return self.task_history()
 
+        elif action == "POOL_STATS":
+            return self.pool_stats()
+
+        elif action == "SUMMARY":
+            return self.summary()
+
+        elif action == "LIST_OVERDUE":
+            return self.list_overdue_tasks()
+
+        elif action == "SLOW_LOG":
+            if self.slow_log is None:
+                return "Registro de comandos lentos desativado."
+            return self.slow_log.report()
+
+        elif action == "PROFILE":
+            if len(parts) not in (2, 3):
+                return "Erro: duração do perfil não fornecida."
+            try:
+                duration = float(parts[1])
+            except ValueError:
+                return "Erro: duração do perfil deve ser um número."
+            mode = parts[2].lower() if len(parts) == 3 else "cprofile"
+            return self.start_profile(duration, mode)
+
         elif action == "REMOVE":
             if len(parts) != 2:
                 return "Erro: ID da tarefa não fornecido."
@@ -197,6 +1183,60 @@ class TaskServer:
         return "Comando desconhecido."
 
     
+    def process_idempotent(self, key: str, command: str) -> str:
+        """
+        Executa um comando de alteração no máximo uma vez por chave de idempotência, para que
+        o cliente possa reenviar comandos cuja resposta não recebeu sem duplicar tarefas.
+        As chaves mais antigas são descartadas quando o cache atinge seu tamanho máximo.
+
+        Args:
+        key (str): A chave de idempotência gerada pelo cliente.
+        command (str): O comando a ser executado.
+
+        Returns:
+        str: A resposta do comando (a original, se a chave já foi vista).
+        """
+        action = self.split_namespace(command)[1].split(maxsplit=1)[0].upper()  # "<lista>:ADD" é um ADD
+        if action not in self.MUTATING_COMMANDS:
+            return self.process_command(command)
+
+        # O lock não fica preso durante a execução: uma repetição da mesma chave espera a
+        # execução em andamento terminar, e comandos com chaves diferentes seguem em paralelo
+        while True:
+            with self.idempotency_lock:
+                response = self.idempotency_cache.get(key)
+                if response is not None:
+                    return response
+                running = self.idempotency_pending.get(key)
+                if running is None:
+                    running = self.idempotency_pending[key] = threading.Event()
+                    break
+            running.wait()  # Se a execução falhar, a chave volta a ser executada por quem esperava
+
+        try:
+            response = self.process_command(command)
+            with self.idempotency_lock:
+                self.idempotency_cache.put(key, response)
+            return response
+        finally:
+            with self.idempotency_lock:
+                del self.idempotency_pending[key]
+            running.set()
+
+    def parse_due_date(self, date_str: str) -> int:
+        """
+        Converte uma data YYYY-MM-DD na data ordinal (dias desde 01/01/0001) usada internamente,
+        que pode ser comparada e agendada sem interpretar a string novamente.
+
+        Returns:
+        int: A data ordinal, ou None se não houver data.
+        """
+        return datetime.strptime(date_str, '%Y-%m-%d').date().toordinal() if date_str else None
+
+    def format_due_date(self, task: dict) -> str:
+        """Formata o vencimento de uma tarefa como YYYY-MM-DD (ou 'Sem vencimento')."""
+        return date.fromordinal(task['due_date']).isoformat() if task['due_date'] else 'Sem vencimento'
+
     def is_valid_date(self, date_str: str) -> bool:
         """
         Verifica se uma string está no formato de data YYYY-MM-DD.
@@ -225,17 +1265,24 @@ class TaskServer:
         Returns:
         str: Confirmação da adição da tarefa.
         """
-        with self.lock:
+        namespace = self.current_namespace()
+        with namespace.lock:
             task = {
-                'id': self.next_id,
+                'id': namespace.next_id,
                 'description': description,
                 'completed': False,
-                'due_date': due_date,
+                'due_date': self.parse_due_date(due_date),  # Data ordinal (date.toordinal) ou None
+                'overdue': False,
                 'priority': priority or 'BAIXA',
-                'subtasks': []
+                'subtasks': {},  # ID da subtarefa -> subtarefa, na ordem de inserção
+                'next_subtask_id': 1,
+                'subtasks_done': 0  # Mantido a cada alteração, para exibir o progresso sem percorrer as subtarefas
             }
-            self.task_tree.insert(task)
-            self.next_id += 1
+            namespace.task_tree.insert(task)
+            namespace.count_task(task, 1)
+            self.schedule_deadline(namespace, task)
+            namespace.next_id += 1
+            namespace.mark_changed(task['id'])
             return f"Tarefa adicionada com sucesso. ID: {task['id']}, Prioridade: {task['priority']}"
     
     def add_subtask(self, task_id: int, description: str) -> str:
@@ -249,23 +1296,85 @@ class TaskServer:
         Returns:
         str: Confirmação da adição da subtarefa ou erro se a tarefa não for encontrada.
         """
-        with self.lock:
-            task = self.task_tree.search(task_id)
+        namespace = self.current_namespace()
+        with namespace.lock:
+            task = namespace.task_tree.search(task_id)
             if task:
                 subtask = {
+                    'id': task['next_subtask_id'],
                     'description': description,
                     'completed': False
                 }
-                task['subtasks'].append(subtask)
-                return f"Subtarefa adicionada com sucesso à tarefa {task_id}."
+                task['subtasks'][subtask['id']] = subtask
+                task['next_subtask_id'] += 1
+                namespace.task_tree.update(task)
+                namespace.mark_changed(task_id)
+                return f"Subtarefa adicionada com sucesso à tarefa {task_id}. ID: {subtask['id']}"
             return f"Tarefa {task_id} não encontrada."
 
+    def complete_subtask(self, task_id: int, subtask_id: int) -> str:
+        """
+        Marca uma subtarefa como concluída, atualizando o contador de subtarefas concluídas da tarefa.
+
+        Args:
+        task_id (int): O ID da tarefa.
+        subtask_id (int): O ID da subtarefa.
+
+        Returns:
+        str: Confirmação ou mensagem de erro se a tarefa ou a subtarefa não for encontrada.
+        """
+        namespace = self.current_namespace()
+        with namespace.lock:
+            task = namespace.task_tree.search(task_id)
+            if not task:
+                return f"Tarefa {task_id} não encontrada."
+            subtask = task['subtasks'].get(subtask_id)
+            if not subtask:
+                return f"Subtarefa {subtask_id} não encontrada na tarefa {task_id}."
+            if not subtask['completed']:
+                subtask['completed'] = True
+                task['subtasks_done'] += 1
+                namespace.task_tree.update(task)
+                namespace.mark_changed(task_id)
+            return f"Subtarefa {subtask_id} da tarefa {task_id} marcada como concluída."
+
+    def remove_subtask(self, task_id: int, subtask_id: int) -> str:
+        """
+        Remove uma subtarefa, atualizando o contador de subtarefas concluídas da tarefa.
+        O ID removido não é reutilizado.
+
+        Args:
+        task_id (int): O ID da tarefa.
+        subtask_id (int): O ID da subtarefa.
+
+        Returns:
+        str: Confirmação ou mensagem de erro se a tarefa ou a subtarefa não for encontrada.
+        """
+        namespace = self.current_namespace()
+        with namespace.lock:
+            task = namespace.task_tree.search(task_id)
+            if not task:
+                return f"Tarefa {task_id} não encontrada."
+            subtask = task['subtasks'].pop(subtask_id, None)
+            if not subtask:
+                return f"Subtarefa {subtask_id} não encontrada na tarefa {task_id}."
+            if subtask['completed']:
+                task['subtasks_done'] -= 1
+            namespace.task_tree.update(task)
+            namespace.mark_changed(task_id)
+            return f"Subtarefa {subtask_id} removida da tarefa {task_id}."
+
     def remove_task(self, task_id: int) -> str:
         """Remove uma tarefa pelo ID."""
-        with self.lock:  # Protege o acesso aos dados compartilhados
-            task = self.task_tree.search(task_id)
+        namespace = self.current_namespace()
+        with namespace.lock:  # Protege o acesso aos dados da lista
+            task = namespace.task_tree.search(task_id)
             if task:
-                self.task_tree.delete(task_id)
+                namespace.task_tree.delete(task_id)
+                namespace.count_task(task, -1)
+                namespace.overdue_ids.pop(task_id, None)
+                self.unschedule_deadline(namespace, task_id)
+                namespace.mark_changed(task_id)
                 return f"Tarefa {task_id} removida com sucesso."
             return f"Tarefa {task_id} não encontrada."
 
@@ -279,15 +1388,15 @@ class TaskServer:
         Returns:
         str: Detalhes da tarefa e suas subtarefas, ou uma mensagem de erro se a tarefa não for encontrada.
         """
-        task = self.task_tree.search(task_id)
+        task = self.current_namespace().task_tree.search(task_id)
         if task:
-            result = f"ID: {task['id']}, Descrição: {task['description']}, Concluída: {task['completed']}, Vencimento: {task['due_date'] or 'Sem vencimento'}, Prioridade: {task['priority']}\n"
+            result = f"ID: {task['id']}, Descrição: {task['description']}, Concluída: {task['completed']}, Vencimento: {self.format_due_date(task)}, Prioridade: {task['priority']}\n"
             
             # Verifica se a tarefa possui subtarefas
             if task['subtasks']:
-                result += "Subtarefas:\n"
-                for subtask in task['subtasks']:
-                    result += f"  - Descrição: {subtask['description']}, Concluída: {subtask['completed']}\n"
+                result += f"Subtarefas ({task['subtasks_done']}/{len(task['subtasks'])} concluídas):\n"
+                for subtask in task['subtasks'].values():
+                    result += f"  - ID: {subtask['id']}, Descrição: {subtask['description']}, Concluída: {subtask['completed']}\n"
             else:
                 result += "Nenhuma subtarefa encontrada.\n"
             
@@ -296,65 +1405,348 @@ class TaskServer:
     
     def complete_task(self, task_id: int) -> str:
         """Marca uma tarefa como concluída."""
-        with self.lock:  # Protege o acesso aos dados compartilhados
-            task = self.task_tree.search(task_id)
+        namespace = self.current_namespace()
+        with namespace.lock:  # Protege o acesso aos dados da lista
+            task = namespace.task_tree.search(task_id)
             if task:
+                namespace.count_task(task, -1)
                 task['completed'] = True  # Marca a tarefa como concluída
+                namespace.count_task(task, 1)
+                namespace.overdue_ids.pop(task_id, None)
+                self.unschedule_deadline(namespace, task_id)
+                namespace.task_tree.update(task)
+                namespace.mark_changed(task_id)
                 return f"Tarefa {task_id} marcada como concluída."
             return f"Tarefa {task_id} não encontrada."
     
     def list_uncompleted_tasks(self) -> str:
         """Lista apenas as tarefas que ainda não foram concluídas, incluindo a data de vencimento e a prioridade."""
-        tasks = []
-        self.task_tree.inorder(lambda node: tasks.append(node.value) if not node.value['completed'] else None)
-        
-        if not tasks:
-            return "Nenhuma tarefa não concluída encontrada."
-        
-        task_list = "\n".join([f"ID: {task['id']}, Descrição: {task['description']}, Vencimento: {task['due_date'] or 'Sem vencimento'}, Prioridade: {task['priority']}, Concluída: {task['completed']}" for task in tasks])
-        return f"Tarefas não concluídas:\n{task_list}"
-    
+        return b''.join(self.uncompleted_task_buffers()).decode()
+
+    def uncompleted_task_buffers(self) -> list:
+        """Versão de "list_uncompleted_tasks" que devolve a resposta como lista de buffers codificados."""
+        buffers = ["Tarefas não concluídas:".encode()]
+        namespace = self.current_namespace()
+        namespace.task_tree.inorder(lambda node: buffers.append(self.cached_fragment(namespace, node.value, 'list', self.render_list_line)) if not node.value['completed'] else None)
+
+        if len(buffers) == 1:
+            return ["Nenhuma tarefa não concluída encontrada.".encode()]
+        return buffers
+
     def list_detailed_uncompleted_tasks(self) -> str:
         """Lista as tarefas não concluídas com suas subtarefas (se houver)."""
-        tasks = []
-        self.task_tree.inorder(lambda node: tasks.append(node.value) if not node.value['completed'] else None)
-        
-        if not tasks:
-            return "Nenhuma tarefa não concluída encontrada."
-        
-        task_list = ""
-        for task in tasks:
-            task_list += f"ID: {task['id']}, Descrição: {task['description']}, Vencimento: {task['due_date'] or 'Sem vencimento'}, Concluída: {task['completed']}\n"
-            if task['subtasks']:
-                task_list += "  Subtarefas:\n"
-                for subtask in task['subtasks']:
-                    task_list += f"    - Descrição: {subtask['description']}, Concluída: {subtask['completed']}\n"
-            task_list += "\n"
-        
-        return f"Tarefas não concluídas (com subtarefas):\n{task_list}"
+        return b''.join(self.detailed_uncompleted_task_buffers()).decode()
+
+    def detailed_uncompleted_task_buffers(self) -> list:
+        """Versão de "list_detailed_uncompleted_tasks" que devolve a resposta como lista de buffers codificados."""
+        buffers = ["Tarefas não concluídas (com subtarefas):\n".encode()]
+        namespace = self.current_namespace()
+        namespace.task_tree.inorder(lambda node: buffers.append(self.cached_fragment(namespace, node.value, 'detailed', self.render_detailed_block)) if not node.value['completed'] else None)
+
+        if len(buffers) == 1:
+            return ["Nenhuma tarefa não concluída encontrada.".encode()]
+        return buffers
 
     def list_subtasks(self, task_id: int) -> str:
         """Lista todas as subtarefas de uma tarefa."""
-        task = self.task_tree.search(task_id)
+        task = self.current_namespace().task_tree.search(task_id)
         if task:
             subtasks = task['subtasks']
             if not subtasks:
                 return f"Tarefa {task_id} não possui subtarefas."
-            subtask_list = "\n".join([f"Descrição: {subtask['description']}, Concluída: {subtask['completed']}" for subtask in subtasks])
-            return f"Subtarefas da Tarefa {task_id}:\n{subtask_list}"
+            subtask_list = "\n".join([f"ID: {subtask['id']}, Descrição: {subtask['description']}, Concluída: {subtask['completed']}" for subtask in subtasks.values()])
+            return f"Subtarefas da Tarefa {task_id} ({task['subtasks_done']}/{len(subtasks)} concluídas):\n{subtask_list}"
         return f"Tarefa {task_id} não encontrada."
     
     def task_history(self) -> str:
         """Lista todas as tarefas (concluídas e não concluídas)."""
-        tasks = []
-        self.task_tree.inorder(lambda node: tasks.append(node.value))
-        
+        return b''.join(self.task_history_buffers()).decode()
+
+    def task_history_buffers(self) -> list:
+        """Versão de "task_history" que devolve a resposta como lista de buffers codificados."""
+        buffers = ["Histórico de Tarefas:".encode()]
+        namespace = self.current_namespace()
+        namespace.task_tree.inorder(lambda node: buffers.append(self.cached_fragment(namespace, node.value, 'history', self.render_history_line)))
+
+        if len(buffers) == 1:
+            return ["Nenhuma tarefa encontrada.".encode()]
+        return buffers
+
+    def render_list_line(self, task: dict) -> str:
+        """
+        Linha de uma tarefa em LIST (com a quebra de linha que a separa da anterior). O progresso
+        das subtarefas vem dos contadores da tarefa, sem percorrer as subtarefas.
+        """
+        line = f"\nID: {task['id']}, Descrição: {task['description']}, Vencimento: {self.format_due_date(task)}, Prioridade: {task['priority']}, Concluída: {task['completed']}"
+        if task['subtasks']:
+            line += f", Subtarefas: {task['subtasks_done']}/{len(task['subtasks'])}"
+        return line
+
+    def render_history_line(self, task: dict) -> str:
+        """Linha de uma tarefa em TASK_HISTORY (com a quebra de linha que a separa da anterior)."""
+        return f"\nID: {task['id']}, Descrição: {task['description']}, Concluída: {task['completed']}"
+
+    def render_detailed_block(self, task: dict) -> str:
+        """Bloco de uma tarefa em LIST_DETAILED, incluindo suas subtarefas."""
+        block = f"ID: {task['id']}, Descrição: {task['description']}, Vencimento: {self.format_due_date(task)}, Concluída: {task['completed']}\n"
+        if task['subtasks']:
+            block += f"  Subtarefas ({task['subtasks_done']}/{len(task['subtasks'])} concluídas):\n"
+            for subtask in task['subtasks'].values():
+                block += f"    - ID: {subtask['id']}, Descrição: {subtask['description']}, Concluída: {subtask['completed']}\n"
+        return block + "\n"
+
+    def cached_fragment(self, namespace: Namespace, task: dict, kind: str, render) -> bytes:
+        """
+        Retorna o fragmento já codificado de uma tarefa para um tipo de listagem, renderizando-o
+        e guardando-o no cache (limitado, compartilhado pelas listas) quando não está lá. O fragmento
+        só é guardado se nenhuma tarefa foi alterada durante a renderização, para não reter uma
+        versão desatualizada.
+
+        Args:
+        namespace (Namespace): A lista de tarefas que está sendo percorrida.
+        task (dict): A tarefa a ser renderizada.
+        kind (str): O tipo de listagem ('list', 'history' ou 'detailed').
+        render (callable): Função que gera o texto do fragmento a partir da tarefa.
+
+        Returns:
+        bytes: O fragmento codificado.
+        """
+        fragment = namespace.rendered.get(namespace, task['id'], kind)
+        if fragment is not None:
+            return fragment
+
+        generation = namespace.render_generation
+        trace = self.slow_log.current() if self.slow_log else None
+        started = time.perf_counter() if trace else 0.0
+        fragment = render(task).encode()
+        if trace:
+            trace.add('render', started)
+        namespace.rendered.put(namespace, task['id'], kind, fragment, generation)
+        return fragment
+
+    def start_profile(self, duration: float, mode: str) -> str:
+        """
+        Inicia uma coleta de perfil dos comandos por "duration" segundos. O resultado é gravado
+        em "profile_dir" ao final da coleta.
+
+        Args:
+        duration (float): Segundos de coleta (até 300).
+        mode (str): "cprofile" (estatísticas por função) ou "sample" (pilhas amostradas).
+
+        Returns:
+        str: Mensagem com o arquivo que receberá o resultado, ou o erro.
+        """
+        if self.profile_dir is None:
+            return "Erro: coleta de perfil desativada neste servidor (inicie-o com --profile-dir)."
+        if mode not in Profiler.MODES:
+            return f"Erro: modo de perfil deve ser {' ou '.join(mode.upper() for mode in Profiler.MODES)}."
+        if not 0 < duration <= 300:
+            return "Erro: duração do perfil deve estar entre 0 e 300 segundos."
+
+        extension = "prof" if mode == "cprofile" else "txt"
+        path = os.path.join(self.profile_dir, f"profile-{datetime.now():%Y%m%d-%H%M%S}-{mode}.{extension}")
+        with self.profiler_lock:
+            if self.profiler is not None:
+                return "Erro: já existe uma coleta de perfil em andamento."
+            self.profiler = Profiler(mode, duration, path, on_finish=self.finish_profile)
+        self.profiler.start()
+        return f"Perfil ({mode}) iniciado por {duration:g} s. Resultado em {path}."
+
+    def finish_profile(self) -> None:
+        """Chamado pelo Profiler ao gravar o resultado: volta a executar os comandos sem perfil."""
+        with self.profiler_lock:
+            self.profiler = None
+
+    def summary(self) -> str:
+        """
+        Resume as tarefas da lista por situação e prioridade e as não concluídas por vencimento, a partir
+        dos contadores mantidos pelas alterações. O custo não depende da quantidade de tarefas,
+        apenas da quantidade de datas de vencimento distintas entre as tarefas abertas.
+        """
+        namespace = self.current_namespace()
+        with namespace.lock:
+            status_counts = dict(namespace.status_counts)
+            due_counts = dict(namespace.open_due_counts)
+
+        lines = ["Resumo das tarefas:"]
+        for label, completed in (("Não concluídas", False), ("Concluídas", True)):
+            by_priority = {priority: status_counts.get((priority, completed), 0) for priority in ("ALTA", "MEDIA", "BAIXA")}
+            details = ", ".join(f"{priority}: {count}" for priority, count in by_priority.items())
+            lines.append(f"{label}: {sum(by_priority.values())} ({details})")
+
+        today = date.today().toordinal()
+        next_week = today + 7
+        buckets = {"Vencidas": 0, "Vencem hoje": 0, "Vencem em até 7 dias": 0, "Vencem depois": 0,
+                   "Sem vencimento": due_counts.pop(None, 0)}
+        for due_date, count in due_counts.items():
+            if due_date < today:
+                buckets["Vencidas"] += count
+            elif due_date == today:
+                buckets["Vencem hoje"] += count
+            elif due_date <= next_week:
+                buckets["Vencem em até 7 dias"] += count
+            else:
+                buckets["Vencem depois"] += count
+        lines.append("Vencimento das não concluídas: " + ", ".join(f"{label}: {count}" for label, count in buckets.items()))
+        return "\n".join(lines)
+
+    def index_task(self, namespace: Namespace, task: dict) -> None:
+        """Registra nos contadores uma tarefa que já estava no armazenamento da lista."""
+        namespace.count_task(task, 1)
+        if task['overdue'] and not task['completed']:
+            namespace.overdue_ids[task['id']] = None
+
+    def unscheduled_due(self, namespace: Namespace, before: int) -> list:
+        """
+        Procura no armazenamento as tarefas abertas, ainda não atrasadas, com vencimento anterior a
+        "before" (as carregadas do armazenamento não estão no heap). Usa "due_before" do armazenamento,
+        quando existe, para ler apenas os campos necessários.
+
+        Returns:
+        list: Tuplas (vencimento ordinal, lista, ID da tarefa).
+        """
+        due_before = getattr(namespace.task_tree, 'due_before', None)
+        if due_before:
+            return [(due_date, namespace.name, task_id) for due_date, task_id in due_before(before)]
+        found = []
+
+        def visit(node):
+            task = node.value
+            if task['due_date'] is not None and task['due_date'] < before and not task['completed'] and not task['overdue']:
+                found.append((task['due_date'], namespace.name, task['id']))
+
+        with namespace.lock:
+            namespace.task_tree.inorder(visit)
+        return found
+
+    def schedule_deadline(self, namespace: Namespace, task: dict) -> None:
+        """
+        Agenda o momento em que uma tarefa aberta com vencimento fica atrasada (chamado dentro do
+        lock da lista). O heap é único para todas as listas e "scheduled" guarda a única entrada
+        válida de cada tarefa: as entradas antigas (prazo alterado, tarefa concluída ou removida)
+        são descartadas quando vencem, e o heap é refeito quando elas passam a ser a maioria.
+        """
+        if task['due_date'] is None or task['completed'] or task['overdue']:
+            self.unschedule_deadline(namespace, task['id'])
+            return
+        key = (namespace.name, task['id'])
+        entry = (task['due_date'], namespace.name, task['id'])
+        with self.deadlines_changed:
+            if self.scheduled.get(key) == task['due_date']:
+                return  # Já agendada com este prazo
+            self.scheduled[key] = task['due_date']
+            heapq.heappush(self.deadlines, entry)
+            self.compact_deadlines()
+            if self.deadlines[0] == entry:
+                self.deadlines_changed.notify_all()  # Novo prazo mais próximo: o temporizador recalcula a espera
+
+    def unschedule_deadline(self, namespace: Namespace, task_id: int) -> None:
+        """Cancela o prazo agendado de uma tarefa concluída ou removida (chamado dentro do lock da lista)."""
+        with self.deadlines_changed:
+            if self.scheduled.pop((namespace.name, task_id), None) is not None:
+                self.compact_deadlines()
+
+    def compact_deadlines(self) -> None:
+        """
+        Refaz o heap só com as entradas válidas quando as desatualizadas passam a ser a maioria
+        (chamado dentro de "deadlines_lock"). O custo é amortizado pelas alterações que as geraram.
+        """
+        if len(self.deadlines) - len(self.scheduled) > len(self.scheduled):
+            self.deadlines = [(due_date, name, task_id) for (name, task_id), due_date in self.scheduled.items()]
+            heapq.heapify(self.deadlines)
+
+    def deadline_timestamp(self, due_date: int) -> float:
+        """Instante (timestamp) em que uma tarefa com esse vencimento fica atrasada: o início do dia seguinte."""
+        return datetime.combine(date.fromordinal(due_date + 1), datetime.min.time()).timestamp()
+
+    def deadline_loop(self) -> None:
+        """
+        Temporizador de vencimentos, executado em uma thread própria: dorme até o próximo prazo
+        do heap (ou até ser acordado por um prazo mais próximo) e marca as tarefas que venceram.
+        O custo é proporcional às tarefas que vencem, não à quantidade de tarefas armazenadas.
+        """
+        while not self.stopping.is_set():
+            try:
+                self.expire_deadlines()
+            except Exception as e:  # Uma falha não pode encerrar o temporizador: tenta de novo em seguida
+                print(f"Erro no temporizador de vencimentos: {str(e)}")
+                self.stopping.wait(self.DEADLINE_RETRY_WAIT)
+                continue
+            with self.deadlines_changed:
+                if self.stopping.is_set():
+                    break
+                timeout = self.DEADLINE_MAX_WAIT
+                for heap in (self.deadlines, self.unscheduled):
+                    if heap:
+                        timeout = min(timeout, max(0.0, self.deadline_timestamp(heap[0][0]) - time.time()))
+                self.deadlines_changed.wait(timeout)
+
+    def expire_deadlines(self) -> list:
+        """
+        Marca como atrasadas as tarefas cujo vencimento já passou, retirando-as do heap, e avisa os
+        inscritos em "overdue_subscribers" (fora dos locks).
+
+        Returns:
+        list: Tuplas (lista, ID) das tarefas que ficaram atrasadas nesta chamada.
+        """
+        today = date.today().toordinal()
+        with self.deadlines_changed:
+            due = []
+            while self.deadlines and self.deadlines[0][0] < today:
+                entry = heapq.heappop(self.deadlines)
+                if self.scheduled.get(entry[1:]) == entry[0]:
+                    del self.scheduled[entry[1:]]
+                    due.append(entry)
+            scan = set()
+            while self.unscheduled and self.unscheduled[0][0] < today:
+                scan.add(heapq.heappop(self.unscheduled)[1])
+        for name in sorted(scan):  # Uma busca por lista cobre todas as datas que já passaram
+            due.extend(self.unscheduled_due(self.namespaces[name], today))
+
+        expired = []
+        for due_date, name, task_id in due:
+            namespace = self.namespaces[name]
+            with namespace.lock:
+                task = namespace.task_tree.search(task_id)
+                if not task or task['completed'] or task['overdue'] or task['due_date'] != due_date:
+                    continue  # Entrada desatualizada: tarefa removida, concluída ou com novo prazo
+                namespace.count_task(task, -1)
+                task['overdue'] = True
+                namespace.count_task(task, 1)
+                namespace.task_tree.update(task)
+                namespace.mark_changed(task_id)
+                namespace.overdue_ids[task_id] = None
+            expired.append((name, task_id))
+
+        for name, task_id in expired:
+            for callback in list(self.overdue_subscribers):
+                try:
+                    callback(name, task_id)
+                except Exception as e:
+                    print(f"Erro ao notificar tarefa atrasada {task_id} da lista {name}: {str(e)}")
+        return expired
+
+    def subscribe_overdue(self, callback) -> None:
+        """
+        Inscreve um callback para ser chamado com a lista e o ID de cada tarefa que ficar atrasada.
+
+        Args:
+        callback (callable): Função que recebe o nome da lista e o ID da tarefa.
+        """
+        self.overdue_subscribers.append(callback)
+
+    def list_overdue_tasks(self) -> str:
+        """Lista as tarefas não concluídas da lista cujo vencimento já passou, sem percorrer as demais tarefas."""
+        self.expire_deadlines()
+        namespace = self.current_namespace()
+        with namespace.lock:
+            tasks = [namespace.task_tree.search(task_id) for task_id in sorted(namespace.overdue_ids)]
+
         if not tasks:
-            return "Nenhuma tarefa encontrada."
-        
-        task_list = "\n".join([f"ID: {task['id']}, Descrição: {task['description']}, Concluída: {task['completed']}" for task in tasks])
-        return f"Histórico de Tarefas:\n{task_list}"
-    
+            return "Nenhuma tarefa atrasada."
+        task_list = "\n".join([f"ID: {task['id']}, Descrição: {task['description']}, Vencimento: {self.format_due_date(task)}, Prioridade: {task['priority']}" for task in tasks])
+        return f"Tarefas atrasadas:\n{task_list}"
+
     def edit_task(self, task_id: int, description: str = None, due_date: str = None, priority: str = None) -> str:
         """
         Edita os detalhes de uma tarefa existente, permitindo modificar a descrição, data de vencimento e prioridade.
@@ -368,18 +1760,62 @@ class TaskServer:
         Returns:
         str: Confirmação da edição da tarefa ou mensagem de erro caso a tarefa não seja encontrada.
         """
-        with self.lock:
-            task = self.task_tree.search(task_id)
+        namespace = self.current_namespace()
+        with namespace.lock:
+            task = namespace.task_tree.search(task_id)
             if task:
+                namespace.count_task(task, -1)
                 if description:
                     task['description'] = description
-                if due_date and self.is_valid_date(due_date):
-                    task['due_date'] = due_date
+                if due_date and self.is_valid_date(due_date) and self.parse_due_date(due_date) != task['due_date']:
+                    task['due_date'] = self.parse_due_date(due_date)
+                    task['overdue'] = False  # Reavaliado pelo temporizador com o novo prazo
+                    namespace.overdue_ids.pop(task_id, None)
+                    self.schedule_deadline(namespace, task)
                 if priority and priority.upper() in ["ALTA", "MEDIA", "BAIXA"]:
                     task['priority'] = priority.upper()
+                namespace.count_task(task, 1)
+                namespace.task_tree.update(task)
+                namespace.mark_changed(task_id)
                 return f"Tarefa {task_id} atualizada com sucesso."
             return f"Tarefa {task_id} não encontrada."
 
 if __name__ == '__main__':
-    server = TaskServer()
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(description="Servidor de gerenciamento de tarefas.")
+    parser.add_argument('store', nargs='?', help="Caminho do armazenamento em disco (opcional).")
+    parser.add_argument('--max-open-stores', type=int, default=256,
+                        help="Listas em disco mantidas abertas ao mesmo tempo (cada uma usa dois descritores de arquivo).")
+    parser.add_argument('--workers', type=int, help="Atende os clientes com um pool fixo de trabalhadores.")
+    parser.add_argument('--queue-depth', type=int, default=256, help="Capacidade da fila do pool.")
+    parser.add_argument('--max-queue-wait', type=float, help="Espera máxima, em segundos, de um comando na fila do pool.")
+    parser.add_argument('--slow-ms', type=float, help="Registra os comandos que levarem mais que este tempo, em milissegundos.")
+    parser.add_argument('--slow-log', help="Arquivo (linhas JSON) onde os comandos lentos são acrescentados.")
+    parser.add_argument('--profile-dir', help="Ativa o comando PROFILE, que grava os resultados nesta pasta.")
+    parser.add_argument('--unix', help="Também escuta em um Unix domain socket neste caminho.")
+    parser.add_argument('--shm', type=int, nargs='?', const=1 << 20, metavar='BYTES',
+                        help="Permite canais de memória compartilhada (SHM_OPEN) com esta capacidade por sentido (padrão: 1 MiB).")
+    parser.add_argument('--max-shm-channels', type=int, default=16,
+                        help="Canais de memória compartilhada abertos ao mesmo tempo (cada um usa uma thread própria).")
+    parser.add_argument('--render-cache', type=int, default=64 << 20, metavar='BYTES',
+                        help="Memória máxima das linhas de listagem guardadas, somando todas as listas (padrão: 64 MiB; 0 desativa).")
+    args = parser.parse_args()
+
+    task_tree = None
+    tree_factory = None
+    if args.store:
+        from ds.mmap_store import MMapTaskStore, OpenStores
+        open_stores = OpenStores(args.max_open_stores)  # As listas usadas há mais tempo são fechadas e reabertas sob demanda
+        task_tree = MMapTaskStore(args.store, open_stores)
+        tree_factory = lambda name: MMapTaskStore(f"{args.store}.{name}", open_stores)  # As demais listas ficam ao lado da padrão
+    slow_log = SlowCommandLog(args.slow_ms / 1000, args.slow_log) if args.slow_ms is not None else None
+    server = TaskServer(task_tree=task_tree, workers=args.workers, queue_depth=args.queue_depth,
+                        max_queue_wait=args.max_queue_wait, slow_log=slow_log, profile_dir=args.profile_dir,
+                        tree_factory=tree_factory, unix_path=args.unix, shm_capacity=args.shm,
+                        render_cache_bytes=args.render_cache,
+                        idempotency_path=f"{args.store}.keys" if args.store else None,
+                        max_shm_channels=args.max_shm_channels)
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
     server.start()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do servidor importam uns aos outros a partir da pasta "server" (ex.: "from ds.avl_tree import AVLTree")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,39 @@
+from admission import AdmissionController
+from server import ClientSession, TaskServer
+
+
+def make_server():
+    server = TaskServer(admission=AdmissionController(request_rates={'read': (0.001, 1), 'write': (100, 200)}))
+    server.add_task("Tarefa")
+    return server, ClientSession(None, server.admission.connection_limits())
+
+
+def dispatch(server, session, command):
+    return b''.join(server.dispatch_command(command, session)).decode()
+
+
+def test_read_wrapped_in_key_uses_read_bucket():
+    server, session = make_server()
+    assert not dispatch(server, session, "TASK_HISTORY").startswith("Erro")
+    assert dispatch(server, session, "KEY x TASK_HISTORY").startswith("Erro: limite de requisições")
+    assert dispatch(server, session, "equipe:TASK_HISTORY").startswith("Erro: limite de requisições")
+
+
+def test_batch_lines_are_admitted_separately():
+    server, session = make_server()
+    response = dispatch(server, session, "BATCH\nTASK_HISTORY\nTASK_HISTORY\nLIST_DETAILED\nKEY k ADD Outra")
+    lines = response.splitlines()
+    assert lines[0] == "Lote com 4 comandos:"
+    assert lines[1].startswith("[1] Histórico de Tarefas:")
+    assert lines[-3].startswith("[2] Erro: limite de requisições")
+    assert lines[-2].startswith("[3] Erro: limite de requisições")
+    assert lines[-1].startswith("[4] Tarefa adicionada com sucesso")
+
+
+def test_rejected_commands_do_not_create_lists():
+    server = TaskServer(admission=AdmissionController(request_rates={'read': (100, 200), 'write': (0.001, 1)}))
+    session = ClientSession(None, server.admission.connection_limits())
+    assert dispatch(server, session, "n0:ADD y").startswith("Tarefa adicionada")
+    for number in range(1, 50):
+        assert dispatch(server, session, f"n{number}:ADD y").startswith("Erro: limite de requisições")
+    assert sorted(server.namespaces) == ["geral", "n0"]
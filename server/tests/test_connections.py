@@ -0,0 +1,161 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from server import ClientSession, TaskServer
+
+
+@pytest.fixture
+def running_server():
+    """Inicia um TaskServer em uma porta livre e o desliga no final do teste."""
+    servers = []
+
+    def start(**options):
+        server = TaskServer(port=0, **options)
+        server.accept_poll_interval = 0.05
+        thread = threading.Thread(target=server.start)
+        thread.start()
+        assert server.ready.wait(5)
+        servers.append((server, thread))
+        return server
+
+    yield start
+    for server, thread in servers:
+        server.shutdown(10)
+        thread.join(10)
+
+
+def test_io_thread_reply_does_not_block_on_a_full_socket():
+    server = TaskServer()
+    conn, peer = socket.socketpair()
+    with conn, peer:
+        conn.settimeout(30)
+        conn.setblocking(False)
+        try:
+            while True:  # Enche os buffers: o outro lado nunca lê
+                conn.send(b'x' * 65536)
+        except BlockingIOError:
+            pass
+        conn.settimeout(30)
+        session = ClientSession(conn, server.admission.connection_limits())
+        started = time.monotonic()
+        assert not server.send_nowait(session, "Erro: servidor sobrecarregado. Tente novamente mais tarde.")
+        assert time.monotonic() - started < 1
+        assert conn.gettimeout() == 30
+
+
+def test_pool_expires_idle_connections_while_serving_others(running_server):
+    server = running_server(workers=2, idle_timeout=0.3)
+    server.idle_check_interval = 0.05
+    with socket.create_connection(("localhost", server.port)) as idle, \
+            socket.create_connection(("localhost", server.port)) as busy:
+        idle.settimeout(5)
+        busy.settimeout(5)
+        for _ in range(8):
+            busy.sendall(b"ADD Tarefa")
+            assert busy.recv(1024).startswith(b"Tarefa adicionada")
+            time.sleep(0.05)
+        assert idle.recv(1024) == "Conexão encerrada por inatividade.".encode()
+        assert idle.recv(1024) == b''
+
+
+def slow_commands(server, delay):
+    """Faz cada comando de "process_command" demorar "delay" segundos."""
+    process_command = server.process_command
+
+    def slow(command):
+        time.sleep(delay)
+        return process_command(command)
+    server.process_command = slow
+
+
+def test_idle_connection_is_closed_with_a_notice(running_server):
+    server = running_server(idle_timeout=0.3)
+    with socket.create_connection(("localhost", server.port)) as conn:
+        conn.settimeout(5)
+        conn.sendall(b"ADD Tarefa")
+        assert conn.recv(1024).startswith(b"Tarefa adicionada")
+        started = time.monotonic()
+        assert conn.recv(1024) == "Conexão encerrada por inatividade.".encode()
+        assert 0.2 < time.monotonic() - started < 3
+        assert conn.recv(1024) == b''
+
+
+def test_client_that_stops_reading_hits_the_send_timeout(running_server):
+    server = running_server(idle_timeout=30, send_timeout=0.3)
+    for number in range(3000):
+        server.process_command(f"ADD Tarefa {number} com uma descrição um pouco mais longa")
+    configure_connection = server.configure_connection
+
+    def small_buffers(conn):
+        configure_connection(conn)
+        conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    server.configure_connection = small_buffers
+
+    with socket.socket() as conn:
+        conn.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        conn.connect(("localhost", server.port))
+        conn.sendall(b"LIST_DETAILED")
+        time.sleep(1.5)  # Não lê: o envio da resposta fica parado
+        conn.settimeout(5)
+        received = b''
+        while chunk := conn.recv(65536):
+            received += chunk
+    assert received.startswith("Tarefas não concluídas".encode())
+    assert "inatividade".encode() not in received  # Fechada pelo timeout de envio, sem o aviso de inatividade
+    assert len(received) < len(server.process_command("LIST_DETAILED").encode())
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_shutdown_drains_commands_in_progress(running_server, workers):
+    server = running_server(workers=workers)
+    slow_commands(server, 0.5)
+    with socket.create_connection(("localhost", server.port)) as conn:
+        conn.settimeout(5)
+        conn.sendall(b"ADD Tarefa")
+        time.sleep(0.1)  # O comando já está em execução
+        started = time.monotonic()
+        assert server.shutdown(5)
+        assert conn.recv(1024).startswith(b"Tarefa adicionada")
+        assert conn.recv(1024) == b''
+        assert time.monotonic() - started < 3
+    assert server.connections == set()
+
+
+def test_shutdown_deadline_closes_connections_that_do_not_drain(running_server):
+    server = running_server()
+    server.shutdown_deadline = 0.3
+    slow_commands(server, 2)
+    with socket.create_connection(("localhost", server.port)) as conn:
+        conn.settimeout(5)
+        conn.sendall(b"ADD Tarefa")
+        time.sleep(0.1)
+        started = time.monotonic()
+        assert server.shutdown(5)
+        assert time.monotonic() - started < 1.5
+        assert conn.recv(1024) == b''  # Fechada à força, antes da resposta
+
+
+def test_shared_memory_channels_are_limited(running_server):
+    server = running_server(shm_capacity=1 << 16, max_shm_channels=1)
+    with socket.create_connection(("localhost", server.port)) as first, \
+            socket.create_connection(("localhost", server.port)) as second:
+        first.settimeout(5)
+        second.settimeout(5)
+        first.sendall(b"SHM_OPEN")
+        assert first.recv(1024).startswith(b"SHM ")
+        second.sendall(b"SHM_OPEN")
+        assert second.recv(1024) == "Erro: limite de 1 canais de memória compartilhada atingido.".encode()
+        second.sendall(b"ADD Tarefa")  # A conexão continua utilizável sem o canal
+        assert second.recv(1024).startswith(b"Tarefa adicionada")
+
+        first.close()  # Encerra o canal e libera a vaga
+        deadline = time.monotonic() + 5
+        opened = False
+        while not opened and time.monotonic() < deadline:
+            second.sendall(b"SHM_OPEN")
+            opened = second.recv(1024).startswith(b"SHM ")
+            time.sleep(0.05)
+        assert opened
@@ -0,0 +1,55 @@
+import threading
+
+from server import TaskServer
+
+
+def test_rescheduling_keeps_one_live_entry_per_task():
+    server = TaskServer()
+    server.add_task("Tarefa", "2999-01-01")
+    for number in range(1000):
+        server.edit_task(1, due_date="2999-01-02" if number % 2 == 0 else "2999-01-01")
+    assert len(server.scheduled) == 1
+    assert len(server.deadlines) <= 3
+
+    server.add_task("Outra", "2999-06-01")
+    server.complete_task(2)
+    server.remove_task(1)
+    assert server.scheduled == {}
+    assert server.deadlines == []
+
+
+def test_loaded_list_is_registered_before_its_dates_are_scheduled():
+    loaded = TaskServer()
+    loaded.add_task("Atrasada", "2020-01-01")
+    server = TaskServer(tree_factory=lambda name: loaded.default_namespace.task_tree)
+    registered = []
+    notify_all = server.deadlines_changed.notify_all
+
+    def check_registered():
+        registered.append("equipe" in server.namespaces)
+        notify_all()
+    server.deadlines_changed.notify_all = check_registered
+
+    server.get_namespace("equipe")
+    assert registered == [True]
+    assert server.expire_deadlines() == [("equipe", 1)]
+
+
+def test_deadline_loop_survives_a_failure():
+    server = TaskServer()
+    server.DEADLINE_RETRY_WAIT = 0.01
+    calls = []
+
+    def flaky_expire():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise KeyError("equipe")
+        server.stopping.set()
+        return []
+    server.expire_deadlines = flaky_expire
+
+    thread = threading.Thread(target=server.deadline_loop)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert calls == [0, 1]
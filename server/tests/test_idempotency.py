@@ -0,0 +1,63 @@
+import threading
+
+from ds.mmap_store import MMapTaskStore
+from idempotency import IdempotencyCache
+from server import TaskServer
+
+
+def test_key_runs_mutation_once():
+    server = TaskServer()
+    first = server.process_command("KEY abc ADD Comprar pão")
+    assert server.process_command("KEY abc ADD Comprar pão") == first
+    assert server.process_command("LIST").count("ID: ") == 1
+
+
+def test_key_with_list_prefix_runs_mutation_once():
+    server = TaskServer()
+    first = server.process_command("KEY abc equipe:ADD Revisar relatório")
+    assert first.startswith("Tarefa adicionada com sucesso. ID: 1")
+    assert server.process_command("KEY abc equipe:ADD Revisar relatório") == first
+    assert server.process_command("equipe:LIST").count("ID: ") == 1
+
+
+def test_concurrent_retries_of_a_key_run_once():
+    server = TaskServer()
+    responses = []
+    threads = [threading.Thread(target=lambda: responses.append(server.process_command("KEY k ADD Tarefa")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(responses)) == 1
+    assert server.process_command("LIST").count("ID: ") == 1
+
+
+def test_key_is_remembered_across_restarts(tmp_path):
+    path = str(tmp_path / "tasks")
+    server = TaskServer(task_tree=MMapTaskStore(path), idempotency_path=path + ".keys")
+    first = server.process_command("KEY abc ADD Comprar pão")
+    server.drain_connections(1)
+    server.default_namespace.task_tree.close()
+
+    server = TaskServer(task_tree=MMapTaskStore(path), idempotency_path=path + ".keys")
+    assert server.process_command("KEY abc ADD Comprar pão") == first
+    assert server.process_command("LIST").count("ID: ") == 1
+    server.default_namespace.task_tree.close()
+
+
+def test_key_file_keeps_only_the_most_recent_keys(tmp_path):
+    path = str(tmp_path / "keys")
+    cache = IdempotencyCache(size=10, path=path)
+    for number in range(95):
+        cache.put(f"k{number}", f"resposta {number}")
+    cache.close()
+    with open(path, encoding='utf-8') as keys_file:
+        assert len(keys_file.readlines()) <= 2 * 10
+    with open(path, 'a', encoding='utf-8') as keys_file:
+        keys_file.write('{"key": "interrompida')  # Gravação interrompida no meio da linha
+
+    reloaded = IdempotencyCache(size=10, path=path)
+    assert [f"k{number}" in reloaded for number in (84, 85, 94)] == [False, True, True]
+    assert reloaded.get("k94") == "resposta 94"
+    reloaded.close()
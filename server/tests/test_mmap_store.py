@@ -0,0 +1,149 @@
+import os
+import threading
+
+from ds.mmap_store import MMapTaskStore
+from server import TaskServer
+
+
+def test_listing_while_store_grows(tmp_path):
+    store = MMapTaskStore(str(tmp_path / "tasks"))
+    server = TaskServer(task_tree=store)
+    errors = []
+    done = threading.Event()
+
+    def list_tasks():
+        while not done.is_set():
+            try:
+                server.process_command("LIST")
+                server.process_command("TASK_HISTORY")
+                server.process_command("SEARCH 1")
+            except Exception as e:
+                errors.append(e)
+                return
+
+    reader = threading.Thread(target=list_tasks)
+    reader.start()
+    try:
+        for number in range(20000):  # Passa várias vezes do tamanho inicial dos dois arquivos
+            server.add_task(f"Tarefa {number} com uma descrição um pouco mais longa", "2030-01-01", "ALTA")
+    finally:
+        done.set()
+        reader.join()
+    assert errors == []
+    assert server.search_task(20000).startswith("ID: 20000")
+    store.close()
+
+
+def test_reopen_uses_saved_summary_and_finds_loaded_deadlines(tmp_path):
+    path = str(tmp_path / "tasks")
+    server = TaskServer(task_tree=MMapTaskStore(path))
+    for number in range(1, 101):
+        server.add_task(f"Tarefa {number}", "2020-01-01" if number % 3 == 0 else "2999-01-01", "MEDIA")
+    server.complete_task(3)
+    summary = server.summary()
+    server.drain_connections(1)  # Grava o resumo, como no desligamento
+    server.default_namespace.task_tree.close()
+
+    store = MMapTaskStore(path)
+    assert store.load_summary() is not None
+    reopened = TaskServer(task_tree=store)
+    assert reopened.summary() == summary
+    assert reopened.deadlines == []  # Nenhum prazo carregado tarefa a tarefa
+    expired = reopened.expire_deadlines()
+    assert sorted(task_id for _, task_id in expired) == list(range(6, 101, 3))
+    assert reopened.list_overdue_tasks().count("ID: ") == 32
+
+    reopened.add_task("Nova")  # Qualquer alteração invalida o resumo gravado
+    assert store.load_summary() is None
+    store.close()
+
+
+def test_reopen_after_updates_keeps_heap_contents(tmp_path):
+    path = str(tmp_path / "tasks")
+    server = TaskServer(task_tree=MMapTaskStore(path))
+    server.add_task("Tarefa com subtarefas")
+    server.add_subtask(1, "Primeira")  # Só regrava a tarefa: o heap cresce sem inserções
+    server.default_namespace.task_tree.close()
+
+    reopened = TaskServer(task_tree=MMapTaskStore(path))
+    reopened.add_task("Outra tarefa com uma descrição longa")
+    assert "Primeira" in reopened.list_subtasks(1)
+    reopened.default_namespace.task_tree.close()
+
+
+def test_subtask_operations_write_only_their_records(tmp_path):
+    path = str(tmp_path / "tasks")
+    store = MMapTaskStore(path)
+    server = TaskServer(task_tree=store)
+    server.add_task("Tarefa com muitas subtarefas")
+
+    before = store.heap_used
+    for number in range(3000):
+        server.add_subtask(1, "Sub")
+    # Descrição + registro, mais as cópias do vetor ao dobrar de capacidade (no pior caso, 4 registros por subtarefa)
+    assert store.heap_used - before <= 3000 * (len("Sub") + 4 * MMapTaskStore.SUBTASK.size)
+
+    before = store.heap_used
+    for number in range(1, 3001):
+        server.complete_subtask(1, number)
+    for number in range(1, 3001, 2):
+        server.remove_subtask(1, number)
+    assert store.heap_used == before  # Concluir e remover alteram os registros no lugar
+    store.close()
+
+    reopened = TaskServer(task_tree=MMapTaskStore(path))
+    listing = reopened.list_subtasks(1)
+    assert listing.startswith("Subtarefas da Tarefa 1 (1500/1500 concluídas):")
+    assert "ID: 2, Descrição: Sub, Concluída: True" in listing and "ID: 1," not in listing
+    assert reopened.add_subtask(1, "Nova").endswith("ID: 3001")
+    reopened.default_namespace.task_tree.close()
+
+
+def test_reopen_compacts_abandoned_heap_space(tmp_path, monkeypatch):
+    monkeypatch.setattr(MMapTaskStore, 'COMPACT_MIN_GARBAGE', 0)
+    path = str(tmp_path / "tasks")
+    store = MMapTaskStore(path)
+    server = TaskServer(task_tree=store)
+    for number in range(1, 51):
+        server.add_task(f"Tarefa {number}")
+        for _ in range(number % 7):
+            server.add_subtask(number, f"Subtarefa da tarefa {number}")
+    for round_number in range(20):  # Cada edição abandona a descrição anterior
+        for number in range(1, 51):
+            server.edit_task(number, description=f"Tarefa {number}, revisão {round_number}")
+    for number in range(1, 51, 5):
+        server.remove_subtask(number, 1)
+    for number in range(2, 51, 10):
+        server.remove_task(number)
+    listings = [server.process_command(command) for command in ("LIST", "LIST_DETAILED", "TASK_HISTORY")]
+    used, garbage = store.heap_used, store.heap_garbage
+    assert garbage > used // 2
+    server.drain_connections(1)
+    store.close()
+
+    compacted = MMapTaskStore(path)
+    # Sai o espaço abandonado e também a capacidade sobrando nos vetores de subtarefas
+    assert compacted.heap_used <= used - garbage and compacted.heap_garbage == 0
+    assert compacted.load_summary() is not None  # O resumo continua válido depois da compactação
+    reopened = TaskServer(task_tree=compacted)
+    assert [reopened.process_command(command) for command in ("LIST", "LIST_DETAILED", "TASK_HISTORY")] == listings
+    assert reopened.add_subtask(6, "Outra").endswith("ID: 7")
+    compacted.close()
+
+
+def test_interrupted_compaction_is_discarded_or_finished(tmp_path):
+    path = str(tmp_path / "tasks")
+    server = TaskServer(task_tree=MMapTaskStore(path))
+    server.add_task("Tarefa")
+    server.default_namespace.task_tree.close()
+
+    for suffix in ('.slots', '.heap'):  # Antes da troca dos registros: a compactação é descartada
+        with open(path + suffix + '.compact', 'wb') as partial:
+            partial.write(b'incompleto')
+    assert MMapTaskStore(path).search(1)['description'] == "Tarefa"
+    assert not os.path.exists(path + '.slots.compact') and not os.path.exists(path + '.heap.compact')
+
+    with open(path + '.heap', 'rb') as heap, open(path + '.heap.compact', 'wb') as finished:
+        finished.write(heap.read())  # Depois da troca dos registros: falta só o heap
+    assert MMapTaskStore(path).search(1)['description'] == "Tarefa"
+    assert not os.path.exists(path + '.heap.compact')
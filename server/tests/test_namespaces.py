@@ -0,0 +1,61 @@
+import errno
+import os
+
+import pytest
+
+from ds.mmap_store import MMapTaskStore, OpenStores
+from server import TaskServer
+
+
+def test_prefix_needs_a_known_command():
+    server = TaskServer()
+    assert server.process_command("http://example.com") == "Comando desconhecido."
+    assert server.process_command("equipe:FOO 1") == "Comando desconhecido."
+    assert list(server.namespaces) == ["geral"]
+    assert server.process_command("equipe:add Revisar").startswith("Tarefa adicionada")
+    assert sorted(server.namespaces) == ["equipe", "geral"]
+
+
+def open_descriptors():
+    return len(os.listdir('/proc/self/fd'))
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason="conta descritores por /proc")
+def test_disk_lists_share_a_bounded_set_of_open_files(tmp_path):
+    open_stores = OpenStores(limit=4)
+    server = TaskServer(task_tree=MMapTaskStore(str(tmp_path / "tasks"), open_stores),
+                        tree_factory=lambda name: MMapTaskStore(str(tmp_path / f"tasks.{name}"), open_stores))
+    before = open_descriptors()
+    for number in range(300):
+        assert server.process_command(f"l{number}:ADD Tarefa da lista {number}").startswith("Tarefa adicionada")
+        server.process_command(f"l{number}:ADD_SUBTASK 1 Subtarefa {number}")
+    assert len(open_stores) <= 4
+    assert open_descriptors() - before <= 2 * 4
+    for number in (0, 150, 299):  # Listas fechadas são reabertas no próximo acesso
+        assert f"Subtarefa {number}" in server.process_command(f"l{number}:SEARCH 1")
+
+
+def test_list_storage_failure_is_an_error_reply():
+    def no_files(name):
+        raise OSError(errno.EMFILE, "Too many open files")
+
+    server = TaskServer(tree_factory=no_files)
+    assert server.process_command("equipe:ADD Revisar") == \
+        "Erro: não foi possível abrir o armazenamento da lista equipe: Too many open files."
+    assert list(server.namespaces) == ["geral"]
+
+
+def test_rendered_fragments_stay_within_the_shared_limit():
+    server = TaskServer(render_cache_bytes=4096)
+    uncached = TaskServer(render_cache_bytes=0)
+    for target in (server, uncached):
+        for number in range(200):
+            target.process_command(f"{'equipe:' if number % 2 else ''}ADD Tarefa {number}")
+    for command in ("LIST", "LIST_DETAILED", "TASK_HISTORY", "equipe:LIST", "LIST", "equipe:TASK_HISTORY"):
+        assert server.process_command(command) == uncached.process_command(command)
+        assert 0 < server.rendered.size <= 4096
+    assert len(uncached.rendered) == 0
+
+    for target in (server, uncached):
+        target.process_command("equipe:EDIT 50 ALTA 2999-01-01")
+    assert server.process_command("equipe:LIST") == uncached.process_command("equipe:LIST")
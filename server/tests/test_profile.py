@@ -0,0 +1,13 @@
+from server import TaskServer
+
+
+def test_profile_disabled_without_profile_dir():
+    server = TaskServer()
+    assert server.process_command("PROFILE 1").startswith("Erro: coleta de perfil desativada")
+    assert server.profiler is None
+
+
+def test_profile_enabled_with_profile_dir(tmp_path):
+    server = TaskServer(profile_dir=str(tmp_path))
+    assert server.process_command("PROFILE 0.05 SAMPLE").startswith("Perfil (sample) iniciado")
+    assert server.process_command("PROFILE 1").startswith("Erro: já existe uma coleta")
@@ -0,0 +1,13 @@
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_client_copy_matches_the_server_implementation():
+    with open(os.path.join(ROOT, "server", "ds", "shm_ring.py"), encoding='utf-8') as server_file:
+        shared = server_file.read().split("\n\nif __name__ == '__main__':")[0] + "\n"
+    with open(os.path.join(ROOT, "client", "ds", "shm_ring.py"), encoding='utf-8') as client_file:
+        lines = client_file.read().splitlines(keepends=True)
+    header = [line for line in lines[:3] if line.startswith("#")]
+    assert header and "Cópia gerada de server/ds/shm_ring.py" in header[0]
+    assert "".join(lines[len(header):]) == shared
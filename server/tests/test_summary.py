@@ -0,0 +1,84 @@
+import random
+from collections import Counter
+
+import pytest
+
+from ds.avl_tree import AVLTree
+from ds.mmap_store import MMapTaskStore
+from server import TaskServer
+
+DATES = ["2020-01-01", "2021-06-15", "2999-01-01", "2999-12-31", None]
+PRIORITIES = ["BAIXA", "MEDIA", "ALTA"]
+
+
+def scanned_counters(namespace):
+    """Recalcula os contadores do resumo percorrendo todas as tarefas da lista."""
+    status_counts, open_due_counts, deadline_counts, overdue_ids = Counter(), Counter(), Counter(), set()
+
+    def visit(node):
+        task = node.value
+        status_counts[(task['priority'], task['completed'])] += 1
+        if not task['completed']:
+            open_due_counts[task['due_date']] += 1
+            if task['due_date'] is not None and not task['overdue']:
+                deadline_counts[task['due_date']] += 1
+            if task['overdue']:
+                overdue_ids.add(task['id'])
+
+    namespace.task_tree.inorder(visit)
+    return +status_counts, +open_due_counts, +deadline_counts, overdue_ids
+
+
+def kept_counters(namespace):
+    return (+namespace.status_counts, +namespace.open_due_counts, +namespace.deadline_counts,
+            set(namespace.overdue_ids))
+
+
+def apply_random_operation(server, rng):
+    task_id = rng.randint(1, server.default_namespace.next_id)
+    operation = rng.randrange(8)
+    if operation <= 1:
+        server.add_task("Tarefa", rng.choice(DATES), rng.choice(PRIORITIES))
+    elif operation == 2:
+        server.complete_task(task_id)
+    elif operation == 3:
+        server.edit_task(task_id, due_date=rng.choice(DATES[:-1]), priority=rng.choice(PRIORITIES))
+    elif operation == 4:
+        server.remove_task(task_id)
+    elif operation == 5:
+        server.add_subtask(task_id, "Subtarefa")
+    elif operation == 6:
+        server.complete_subtask(task_id, 1)
+    else:
+        server.expire_deadlines()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_counters_match_full_scan_in_memory(seed):
+    rng = random.Random(seed)
+    server = TaskServer(task_tree=AVLTree())
+    for _ in range(600):
+        apply_random_operation(server, rng)
+        assert kept_counters(server.default_namespace) == scanned_counters(server.default_namespace)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_counters_match_full_scan_across_reopens(tmp_path, seed):
+    rng = random.Random(seed)
+    path = str(tmp_path / "tasks")
+    server = TaskServer(task_tree=MMapTaskStore(path))
+    for round_number in range(4):
+        for _ in range(150):
+            apply_random_operation(server, rng)
+            assert kept_counters(server.default_namespace) == scanned_counters(server.default_namespace)
+        clean = round_number % 2 == 0  # Alterna reabertura com resumo gravado e sem ele
+        if clean:
+            server.drain_connections(1)
+        server.default_namespace.task_tree.close()
+        store = MMapTaskStore(path)
+        assert (store.load_summary() is not None) == clean
+        server = TaskServer(task_tree=store)
+        assert kept_counters(server.default_namespace) == scanned_counters(server.default_namespace)
+        server.expire_deadlines()  # Alcança os prazos carregados do armazenamento
+        assert kept_counters(server.default_namespace) == scanned_counters(server.default_namespace)
+    server.default_namespace.task_tree.close()
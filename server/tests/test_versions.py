@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+import threading
+
+from server import TaskServer
+
+CLIENT = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                      "client", "client.py")
+
+
+def test_version_header_carries_the_response_size():
+    server = TaskServer()
+    for number in range(80):
+        server.process_command(f"ADD Tarefa número {number} com acentuação")
+    header, *body = server.conditional_buffers("-", "LIST")
+    fields = header.decode().split()
+    assert fields[0] == "VERSION" and len(fields) == 3
+    assert int(fields[2]) == sum(len(buffer) for buffer in body) > 1024
+    assert server.conditional_buffers(fields[1], "LIST") == [f"NOT_MODIFIED {fields[1]}".encode()]
+
+
+def test_client_caches_only_complete_responses():
+    server = TaskServer(port=0)
+    for number in range(80):
+        server.process_command(f"ADD Tarefa número {number} com acentuação")
+    listing = server.process_command("LIST")
+    found = server.process_command("SEARCH 1")
+    assert len(listing.encode()) > 4096  # Maior que uma leitura do cliente sem compressão
+
+    thread = threading.Thread(target=server.start)
+    thread.start()
+    try:
+        assert server.ready.wait(5)
+        # LIST é guardada e a segunda vez vem do cache (NOT_MODIFIED); SEARCH precisa chegar intacta
+        result = subprocess.run([sys.executable, CLIENT, "--port", str(server.port), "--transport", "tcp"],
+                                input="LIST\nLIST\nSEARCH 1\nexit\n", capture_output=True, text=True, timeout=30)
+    finally:
+        server.shutdown(10)
+        thread.join(10)
+
+    responses = result.stdout.split("Resposta do servidor: ")[1:]
+    assert len(responses) == 3
+    assert responses[0].startswith(listing) and responses[1].startswith(listing)
+    assert responses[2].startswith(found)
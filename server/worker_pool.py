@@ -0,0 +1,108 @@
+import queue
+import threading
+import time
+
+
+class WorkerPool:
+    """
+    Pool de tamanho fixo de threads trabalhadoras alimentado por uma fila limitada.
+
+    Quando a fila está cheia, "submit" recusa o item imediatamente; itens que
+    esperaram na fila mais do que "max_queue_wait" são entregues ao handler
+    marcados como expirados, para que sejam respondidos sem processamento.
+    Assim a sobrecarga aparece como fila e rejeições, e não como criação
+    ilimitada de threads.
+    """
+
+    def __init__(self, handler, workers: int = 8, queue_depth: int = 256, max_queue_wait: float = None) -> None:
+        """
+        Args:
+        handler (callable): Função chamada como handler(item, expired) por uma thread trabalhadora.
+        workers (int): Número de threads trabalhadoras.
+        queue_depth (int): Capacidade máxima da fila de itens pendentes.
+        max_queue_wait (float, optional): Tempo máximo, em segundos, que um item pode esperar na fila.
+        """
+        self.handler = handler
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.max_queue_wait = max_queue_wait
+        self.queue = queue.Queue(maxsize=queue_depth)
+        self.threads = []
+        self.stats_lock = threading.Lock()
+        self.busy = 0
+        self.processed = 0
+        self.rejected = 0
+        self.expired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def start(self) -> None:
+        for number in range(self.workers):
+            thread = threading.Thread(target=self.__work, name=f"worker-{number}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, item) -> bool:
+        """
+        Enfileira um item sem bloquear.
+
+        Returns:
+        bool: False se a fila estiver cheia e o item foi recusado.
+        """
+        try:
+            self.queue.put_nowait((time.monotonic(), item))
+            return True
+        except queue.Full:
+            with self.stats_lock:
+                self.rejected += 1
+            return False
+
+    def shutdown(self, timeout: float = None) -> bool:
+        """
+        Processa os itens que ainda estão na fila e encerra as threads.
+
+        Returns:
+        bool: True se todas as threads terminaram dentro do prazo.
+        """
+        for _ in self.threads:
+            self.queue.put((time.monotonic(), None))
+        limit = None if timeout is None else time.monotonic() + timeout
+        for thread in self.threads:
+            thread.join(None if limit is None else max(0.0, limit - time.monotonic()))
+        return not any(thread.is_alive() for thread in self.threads)
+
+    def stats(self) -> dict:
+        """Retorna um retrato dos contadores do pool."""
+        with self.stats_lock:
+            return {
+                'workers': self.workers,
+                'busy': self.busy,
+                'queue_depth': self.queue_depth,
+                'queued': self.queue.qsize(),
+                'processed': self.processed,
+                'rejected': self.rejected,
+                'expired': self.expired,
+                'avg_wait_ms': self.total_wait / self.processed * 1000 if self.processed else 0.0,
+                'max_wait_ms': self.max_wait * 1000,
+            }
+
+    def __work(self) -> None:
+        while True:
+            enqueued, item = self.queue.get()
+            if item is None:
+                break
+            wait = time.monotonic() - enqueued
+            expired = self.max_queue_wait is not None and wait > self.max_queue_wait
+            with self.stats_lock:
+                self.busy += 1
+                self.processed += 1
+                self.expired += expired
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                self.handler(item, expired)
+            except Exception as e:
+                print(f"Erro no trabalhador: {str(e)}")
+            finally:
+                with self.stats_lock:
+                    self.busy -= 1